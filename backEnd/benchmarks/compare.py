@@ -0,0 +1,61 @@
+"""Compares two benchmark reports and exits 1 when a scenario regressed past the threshold.
+
+    python -m benchmarks.compare baseline.json bench.json --threshold 10
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+
+
+# métricas em que "maior" é pior; rps é tratado ao contrário
+LATENCY_KEYS = ("p50_ms", "p95_ms", "p99_ms")
+
+
+def change(old, new):
+    if not old:
+        return 0.0
+    return (new - old) / old * 100
+
+
+def compare(baseline, current, threshold):
+    rows = []
+    regressions = []
+    for transport, scenarios in current["results"].items():
+        for name, stats in scenarios.items():
+            old = baseline["results"].get(transport, {}).get(name)
+            if old is None:
+                continue
+            deltas = {key: change(old[key], stats[key]) for key in (*LATENCY_KEYS, "rps")}
+            rows.append((transport, name, old, stats, deltas))
+            if deltas["p95_ms"] > threshold or -deltas["rps"] > threshold:
+                regressions.append(f"{transport}/{name}")
+    return rows, regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare two benchmark JSON reports")
+    parser.add_argument("baseline", type=Path)
+    parser.add_argument("current", type=Path)
+    parser.add_argument("--threshold", type=float, default=10.0, help="max allowed p95 increase / rps decrease, in percent")
+    args = parser.parse_args(argv)
+
+    baseline = json.loads(args.baseline.read_text())
+    current = json.loads(args.current.read_text())
+    if baseline["meta"]["params"] != current["meta"]["params"]:
+        print("warning: reports were produced with different parameters", file=sys.stderr)
+
+    rows, regressions = compare(baseline, current, args.threshold)
+    print(f"{baseline['meta']['revision']} -> {current['meta']['revision']}")
+    print(f"{'scenario':24} {'p50 ms':>18} {'p95 ms':>18} {'p99 ms':>18} {'req/s':>18}")
+    for transport, name, old, new, deltas in rows:
+        cells = [f"{new[key]:>9} {deltas[key]:+7.1f}%" for key in (*LATENCY_KEYS, "rps")]
+        print(f"{transport + '/' + name:24} " + " ".join(cells))
+
+    if regressions:
+        print(f"regressions over {args.threshold}%: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
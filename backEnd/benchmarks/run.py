@@ -0,0 +1,300 @@
+"""Local load/benchmark suite: seeds SQLite, drives the app and prints comparable JSON.
+
+    python -m benchmarks.run --transport asgi uvicorn --output bench.json
+    python -m benchmarks.compare baseline.json bench.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from pathlib import Path
+
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+SCENARIOS = ("login", "get_item", "list", "search", "summary", "deep_offset", "cursor_walk", "mixed")
+RESOURCES = ("vehicles", "equipment", "equipment-safety")
+
+
+def configure_environment(db_path: Path):
+    # precisa acontecer antes de qualquer import de wayne_api (settings são lidos no import)
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+    os.environ["ASYNC_DATABASE_URL"] = f"sqlite+aiosqlite:///{db_path}"
+    os.environ.setdefault("SECRET_KEY", "bench-secret")
+    os.environ.setdefault("ALGORITHM", "HS256")
+    os.environ.setdefault("SLOW_REQUEST_MS", "0")
+    # todo o tráfego sai do mesmo IP; sem isso o cenário login mediria só o 429
+    os.environ.setdefault("LOGIN_IP_RATE_PER_MINUTE", "0")
+    os.environ.setdefault("LOGIN_EMAIL_RATE_PER_MINUTE", "0")
+
+
+def prepare_database(db_path: Path, args):
+    for suffix in ("", "-wal", "-shm"):
+        Path(f"{db_path}{suffix}").unlink(missing_ok=True)
+    # alembic em subprocesso: o fileConfig do env.py reconfiguraria o logging deste processo
+    subprocess.run([sys.executable, "-m", "alembic", "upgrade", "head"], cwd=BACKEND_DIR, env=os.environ, check=True, capture_output=True)
+
+    from benchmarks.seed import seed_database
+    from wayne_api.database import SessionLocal, engine
+
+    started = time.perf_counter()
+    with SessionLocal() as session:
+        seed_database(session, args.users, args.vehicles, args.equipment, args.equipment_safety, seed=args.seed)
+    engine.dispose()
+    return time.perf_counter() - started
+
+
+class Workload:
+    """The request mix of every scenario; each call issues exactly one request."""
+
+    def __init__(self, args):
+        self.args = args
+        self.headers = {}
+
+    async def authenticate(self, client):
+        from benchmarks.seed import BENCH_PASSWORD, user_email
+
+        response = await client.post("/auth/login", json={"email": user_email(0), "password": BENCH_PASSWORD})
+        response.raise_for_status()
+        self.headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    def _count(self, resource):
+        return {"vehicles": self.args.vehicles, "equipment": self.args.equipment, "equipment-safety": self.args.equipment_safety}[resource]
+
+    async def login(self, client, rng, state):
+        from benchmarks.seed import BENCH_PASSWORD, user_email
+
+        email = user_email(rng.randrange(self.args.users))
+        return await client.post("/auth/login", json={"email": email, "password": BENCH_PASSWORD})
+
+    async def get_item(self, client, rng, state):
+        resource = rng.choice(RESOURCES)
+        return await client.get(f"/{resource}/{rng.randint(1, self._count(resource))}", headers=self.headers)
+
+    async def list(self, client, rng, state):
+        from benchmarks.seed import VEHICLE_TYPES
+
+        choice = rng.randrange(3)
+        if choice == 0:
+            params = {"type": rng.choice(VEHICLE_TYPES), "year_min": 1990, "sort": "-year", "limit": 50}
+            return await client.get("/vehicles/", params=params, headers=self.headers)
+        if choice == 1:
+            return await client.get("/equipment/", params={"sort": "name", "limit": 50}, headers=self.headers)
+        return await client.get("/equipment-safety/", params={"status": "false", "limit": 50}, headers=self.headers)
+
+    async def search(self, client, rng, state):
+        from benchmarks.seed import DESCRIPTION_WORDS, EQUIPMENT_NAMES
+
+        query = f"{rng.choice(EQUIPMENT_NAMES)} {rng.choice(DESCRIPTION_WORDS)[:3]}*"
+        return await client.get("/search/", params={"q": query, "limit": 20}, headers=self.headers)
+
+    async def summary(self, client, rng, state):
+        return await client.get("/summary/", headers=self.headers)
+
+    async def deep_offset(self, client, rng, state):
+        offset = rng.randrange(max(self.args.vehicles - 50, 1))
+        return await client.get("/vehicles/", params={"offset": offset, "limit": 50}, headers=self.headers)
+
+    async def cursor_walk(self, client, rng, state):
+        params = {"limit": 50}
+        if state.get("cursor"):
+            params["after"] = state["cursor"]
+        response = await client.get("/vehicles/", params=params, headers=self.headers)
+        if response.status_code == 200:
+            state["cursor"] = response.json()["next_cursor"]
+        return response
+
+    async def mixed(self, client, rng, state):
+        # 80% leituras, 20% escritas (criação, PATCH de status e remoção do que este worker criou)
+        roll = rng.random()
+        if roll < 0.5:
+            return await self.get_item(client, rng, state)
+        if roll < 0.8:
+            return await self.list(client, rng, state)
+        if roll < 0.9:
+            payload = {"type": "land", "model": f"Bench {rng.randrange(10**6)}", "year": rng.randint(1939, 2025)}
+            response = await client.post("/vehicles/", json=payload, headers=self.headers)
+            if response.status_code == 201:
+                state.setdefault("created", []).append(response.json()["id"])
+            return response
+        if roll < 0.97 or not state.get("created"):
+            item_id = rng.randint(1, self.args.equipment_safety)
+            return await client.patch(f"/equipment-safety/{item_id}", json={"status": rng.random() < 0.5}, headers=self.headers)
+        return await client.delete(f"/vehicles/{state['created'].pop()}", headers=self.headers)
+
+
+def summarize(latencies, elapsed, statuses, errors):
+    latencies_ms = sorted(latency * 1000 for latency in latencies)
+    percentiles = statistics.quantiles(latencies_ms, n=100, method="inclusive") if len(latencies_ms) > 1 else latencies_ms * 99
+    return {
+        "requests": len(latencies_ms),
+        "errors": errors,
+        "elapsed_s": round(elapsed, 3),
+        "rps": round(len(latencies_ms) / elapsed, 1) if elapsed else 0.0,
+        "mean_ms": round(statistics.fmean(latencies_ms), 3) if latencies_ms else 0.0,
+        "p50_ms": round(percentiles[49], 3) if latencies_ms else 0.0,
+        "p95_ms": round(percentiles[94], 3) if latencies_ms else 0.0,
+        "p99_ms": round(percentiles[98], 3) if latencies_ms else 0.0,
+        "max_ms": round(latencies_ms[-1], 3) if latencies_ms else 0.0,
+        "status_codes": {str(code): count for code, count in sorted(statuses.items())},
+    }
+
+
+async def run_scenario(client, name, operation, args):
+    rng = random.Random(f"{args.seed}:{name}:warmup")
+    state = {}
+    for _ in range(args.warmup):
+        await operation(client, rng, state)
+
+    latencies = []
+    statuses = Counter()
+    errors = 0
+    tickets = iter(range(args.requests))
+
+    async def worker(index):
+        nonlocal errors
+        rng = random.Random(f"{args.seed}:{name}:{index}")
+        state = {}
+        while next(tickets, None) is not None:
+            started = time.perf_counter()
+            try:
+                response = await operation(client, rng, state)
+            except Exception:
+                errors += 1
+                continue
+            latencies.append(time.perf_counter() - started)
+            statuses[response.status_code] += 1
+            if response.status_code >= 400:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(index) for index in range(args.concurrency)))
+    return summarize(latencies, time.perf_counter() - started, statuses, errors)
+
+
+async def run_transport(client, args):
+    workload = Workload(args)
+    await workload.authenticate(client)
+    results = {}
+    for name in args.scenarios:
+        results[name] = await run_scenario(client, name, getattr(workload, name), args)
+        print(f"  {name:12} {results[name]['rps']:>9} req/s  p50 {results[name]['p50_ms']:>9} ms  p99 {results[name]['p99_ms']:>9} ms", file=sys.stderr)
+    return results
+
+
+async def run_asgi(args):
+    import httpx
+    from wayne_api.app import app
+    from wayne_api.database import dispose_engines
+    from wayne_api.passwords import password_pool
+
+    try:
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+            return await run_transport(client, args)
+    finally:
+        password_pool.shutdown()
+        await dispose_engines()
+
+
+async def run_uvicorn(args):
+    import httpx
+
+    command = [
+        sys.executable, "-m", "uvicorn", "wayne_api.app:app",
+        "--host", "127.0.0.1", "--port", str(args.port), "--workers", str(args.workers), "--log-level", "warning",
+    ]
+    server = subprocess.Popen(command, cwd=BACKEND_DIR, env=os.environ)
+    base_url = f"http://127.0.0.1:{args.port}"
+    try:
+        limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+        async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+            deadline = time.monotonic() + 30
+            while True:
+                try:
+                    await client.get("/openapi.json")
+                    break
+                except httpx.TransportError:
+                    if time.monotonic() > deadline or server.poll() is not None:
+                        raise RuntimeError("uvicorn did not start")
+                    await asyncio.sleep(0.2)
+            return await run_transport(client, args)
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+
+def git_revision():
+    try:
+        revision = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=BACKEND_DIR, capture_output=True, text=True).stdout.strip()
+        return revision + ("-dirty" if dirty else "")
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Seed SQLite and benchmark the Wayne API")
+    parser.add_argument("--db", type=Path, default=Path(tempfile.gettempdir()) / "wayne-bench.db", help="benchmark database (recreated on every run)")
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--vehicles", type=int, default=10000)
+    parser.add_argument("--equipment", type=int, default=10000)
+    parser.add_argument("--equipment-safety", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--requests", type=int, default=500, help="measured requests per scenario")
+    parser.add_argument("--warmup", type=int, default=20, help="unmeasured requests before each scenario")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--transport", nargs="+", choices=("asgi", "uvicorn"), default=["asgi"])
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers")
+    parser.add_argument("--output", type=Path, help="write the JSON report here instead of stdout")
+    args = parser.parse_args(argv)
+
+    db_path = args.db.resolve()
+    configure_environment(db_path)
+    sys.path.insert(0, str(BACKEND_DIR))
+
+    report = {
+        "meta": {
+            "revision": git_revision(),
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "database_mode": os.getenv("DATABASE_MODE", "async"),
+            "database_profile": os.getenv("DATABASE_PROFILE", "default"),
+            "bcrypt_rounds": int(os.getenv("BCRYPT_ROUNDS", 12)),
+            "fast_json": os.getenv("FAST_JSON", "false"),
+            "params": {
+                key: getattr(args, key)
+                for key in ("users", "vehicles", "equipment", "equipment_safety", "seed", "requests", "warmup", "concurrency", "workers")
+            },
+        },
+        "results": {},
+    }
+
+    # cada transporte recebe um banco recém-semeado, para que escritas de um não afetem o outro
+    for transport in args.transport:
+        print(f"seeding {db_path} ...", file=sys.stderr)
+        report["meta"].setdefault("seed_seconds", {})[transport] = round(prepare_database(db_path, args), 3)
+        print(f"{transport}:", file=sys.stderr)
+        runner = run_asgi if transport == "asgi" else run_uvicorn
+        report["results"][transport] = asyncio.run(runner(args))
+
+    output = json.dumps(report, indent=2, sort_keys=True)
+    if args.output:
+        args.output.write_text(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
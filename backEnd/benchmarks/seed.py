@@ -0,0 +1,59 @@
+"""Deterministic seed data for the benchmark suite (same arguments, same rows)."""
+import random
+
+from sqlalchemy import insert
+
+from wayne_api.models import User, Vehicle, Equipment, EquipmentSafety
+from wayne_api.passwords import hash_password
+from wayne_api.summary import rebuild_counters
+
+
+BENCH_PASSWORD = "bench-password"
+VEHICLE_TYPES = ("land", "aerial", "aquatic", "armored")
+VEHICLE_MODELS = ("Tumbler", "Batmobile", "Batwing", "Batboat", "Batpod", "Batcycle")
+EQUIPMENT_NAMES = ("grapple", "batarang", "cowl", "gauntlet", "cape", "scanner", "rebreather", "smoke pellet")
+DESCRIPTION_WORDS = ("kevlar", "carbon", "tactical", "thermal", "sonar", "retractable", "armored", "stealth", "night", "vision")
+
+
+def user_email(index: int):
+    return f"user{index}@bench.wayne"
+
+
+def _description(rng):
+    return " ".join(rng.choice(DESCRIPTION_WORDS) for _ in range(rng.randint(3, 8)))
+
+
+def _insert_chunks(session, model, rows, chunk_size):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            session.execute(insert(model), chunk)
+            chunk = []
+    if chunk:
+        session.execute(insert(model), chunk)
+
+
+def seed_database(session, users: int, vehicles: int, equipment: int, equipment_safety: int, seed: int = 0, chunk_size: int = 5000):
+    """Fills an empty, migrated database. user0 is admin; every user has BENCH_PASSWORD."""
+    rng = random.Random(seed)
+    # um único hash para todos: o custo do bcrypt fica no login medido, não no seed
+    password = hash_password(BENCH_PASSWORD)
+    _insert_chunks(session, User, (
+        {"name": f"User {index}", "email": user_email(index), "password": password, "admin": index == 0}
+        for index in range(users)
+    ), chunk_size)
+    _insert_chunks(session, Vehicle, (
+        {"type": rng.choice(VEHICLE_TYPES), "model": f"{rng.choice(VEHICLE_MODELS)} {index}", "year": rng.randint(1939, 2025)}
+        for index in range(vehicles)
+    ), chunk_size)
+    _insert_chunks(session, Equipment, (
+        {"name": f"{rng.choice(EQUIPMENT_NAMES)} {index}", "description": _description(rng)}
+        for index in range(equipment)
+    ), chunk_size)
+    _insert_chunks(session, EquipmentSafety, (
+        {"name": f"{rng.choice(EQUIPMENT_NAMES)} {index}", "status": rng.random() < 0.8, "description": _description(rng)}
+        for index in range(equipment_safety)
+    ), chunk_size)
+    session.commit()
+    rebuild_counters(session)
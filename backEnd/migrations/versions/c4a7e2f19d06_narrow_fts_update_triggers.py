@@ -0,0 +1,50 @@
+"""narrow fts update triggers
+
+Revision ID: c4a7e2f19d06
+Revises: b71f0c4e9a23
+Create Date: 2026-10-18 17:41:12.508219
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4a7e2f19d06'
+down_revision: Union[str, Sequence[str], None] = 'b71f0c4e9a23'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+FTS_TABLES = {
+    "equipment": ("name", "description"),
+    "equipment_safety": ("name", "description"),
+}
+
+
+def _create_update_trigger(table: str, columns, watched: str):
+    fts = f"{table}_fts"
+    column_list = ", ".join(columns)
+    new_values = ", ".join(f"new.{column}" for column in columns)
+    old_values = ", ".join(f"old.{column}" for column in columns)
+    op.execute(f"DROP TRIGGER IF EXISTS {fts}_au")
+    op.execute(
+        f"CREATE TRIGGER {fts}_au AFTER UPDATE{watched} ON {table} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {column_list}) VALUES ('delete', old.id, {old_values}); "
+        f"INSERT INTO {fts}(rowid, {column_list}) VALUES (new.id, {new_values}); END"
+    )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # só as colunas indexadas: um PATCH de status não reescreve o índice FTS
+    for table, columns in FTS_TABLES.items():
+        _create_update_trigger(table, columns, f" OF {', '.join(columns)}")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table, columns in FTS_TABLES.items():
+        _create_update_trigger(table, columns, "")
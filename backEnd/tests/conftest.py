@@ -0,0 +1,97 @@
+import os
+import sqlite3
+import tempfile
+
+# as settings são lidas no import: o banco de teste precisa estar no ambiente antes de importar o app
+_DB_DIR = tempfile.mkdtemp(prefix="wayne-tests-")
+DB_PATH = os.path.join(_DB_DIR, "wayne.db")
+os.environ.update({
+    "DATABASE_URL": f"sqlite:///{DB_PATH}",
+    "ASYNC_DATABASE_URL": f"sqlite+aiosqlite:///{DB_PATH}",
+    "SECRET_KEY": "test-secret",
+    "ALGORITHM": "HS256",
+    "BCRYPT_ROUNDS": "4",
+    "USER_CACHE_TTL_SECONDS": "0",
+    "WARMUP_ON_STARTUP": "false",
+    "HISTORY_COMPACT_INTERVAL_SECONDS": "0",
+    "LOGIN_IP_RATE_PER_MINUTE": "0",
+    "LOGIN_EMAIL_RATE_PER_MINUTE": "0",
+})
+
+import httpx
+import pytest
+from alembic import command
+from alembic.config import Config
+
+from wayne_api import database
+from wayne_api.app import app
+from wayne_api.etag import collection_versions
+
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+COLLECTIONS = ("vehicles", "equipment", "equipment_safety")
+
+
+def pytest_configure(config):
+    alembic_config = Config(os.path.join(BACKEND_DIR, "alembic.ini"))
+    alembic_config.set_main_option("script_location", os.path.join(BACKEND_DIR, "migrations"))
+    command.upgrade(alembic_config, "head")
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+def db():
+    """Direct connection to the test database, for seeding rows and checking what was written."""
+    connection = sqlite3.connect(DB_PATH)
+    yield connection
+    connection.close()
+
+
+@pytest.fixture(autouse=True)
+def clean_tables(db):
+    for table in ("vehicles", "equipment", "equipment_safety", "summary_counters", "import_jobs",
+                  "equipment_safety_status_events", "equipment_safety_daily_status", "users"):
+        db.execute(f"DELETE FROM {table}")
+    db.commit()
+    # escritas direto no banco não passam pelos handlers: invalida ETags e totais em cache
+    for collection in COLLECTIONS:
+        collection_versions.bump(collection)
+
+
+@pytest.fixture(autouse=True)
+def session_slots(monkeypatch):
+    # o semáforo do modo sync fica preso ao loop em que alguém esperou nele; cada teste roda num loop novo
+    slots = database._pool_slots(database.engine)
+    read_slots = slots if database.read_engine is database.engine else database._pool_slots(database.read_engine)
+    monkeypatch.setattr(database, "session_slots", slots)
+    monkeypatch.setattr(database, "read_session_slots", read_slots)
+
+
+@pytest.fixture
+async def client():
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            yield client
+
+
+async def _login(client, db, email: str, admin: bool):
+    response = await client.post("/auth/register", json={"name": email, "email": email, "password": "secret-password"})
+    assert response.status_code == 201
+    db.execute("UPDATE users SET admin = ? WHERE email = ?", (admin, email))
+    db.commit()
+    response = await client.post("/auth/login", json={"email": email, "password": "secret-password"})
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+@pytest.fixture
+async def admin_headers(client, db):
+    return await _login(client, db, "admin@wayne.test", admin=True)
+
+
+@pytest.fixture
+async def user_headers(client, db):
+    return await _login(client, db, "user@wayne.test", admin=False)
@@ -0,0 +1,120 @@
+import pytest
+
+from wayne_api.database import SessionLocal
+from wayne_api.summary import rebuild_counters
+
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def vehicle_ids(db):
+    db.executemany("INSERT INTO vehicles (type, model, year) VALUES (?, ?, ?)", [("land", "Tumbler", 2005), ("aerial", "Batwing", 1989)])
+    db.commit()
+    with SessionLocal() as session:
+        rebuild_counters(session)
+    return [row[0] for row in db.execute("SELECT id FROM vehicles ORDER BY id")]
+
+
+@pytest.fixture
+def reject_boom(db):
+    # qualquer violação de constraint no meio do lote; RAISE(ABORT) chega como IntegrityError
+    db.execute("CREATE TRIGGER reject_boom BEFORE INSERT ON vehicles WHEN NEW.model = 'boom' BEGIN SELECT RAISE(ABORT, 'boom rejected'); END")
+    db.commit()
+    yield
+    db.execute("DROP TRIGGER reject_boom")
+    db.commit()
+
+
+async def summary_total(client, headers):
+    return (await client.get("/summary/", headers=headers)).json()["totals"]["vehicles"]
+
+
+async def test_null_for_required_field_is_item_error(client, admin_headers, db, vehicle_ids):
+    response = await client.post("/vehicles/batch", json=[
+        {"op": "update", "id": vehicle_ids[0], "data": {"model": None}},
+        {"op": "update", "id": vehicle_ids[1], "data": {"year": 1990}},
+    ], headers=admin_headers)
+    assert response.status_code == 200
+    first, second = response.json()["results"]
+    assert first["status"] == "invalid" and "model" in first["detail"]
+    assert second["status"] == "updated"
+    assert db.execute("SELECT model FROM vehicles WHERE id = ?", (vehicle_ids[0],)).fetchone() == ("Tumbler",)
+    assert db.execute("SELECT year FROM vehicles WHERE id = ?", (vehicle_ids[1],)).fetchone() == (1990,)
+
+
+async def test_unknown_keys_are_rejected(client, admin_headers, db, vehicle_ids):
+    response = await client.post("/vehicles/batch", json=[
+        {"op": "update", "id": vehicle_ids[0], "data": {"colour": "black"}},
+        {"op": "create", "data": {"type": "land", "model": "Batpod", "year": 2008, "wheels": 2}},
+    ], headers=admin_headers)
+    assert [result["status"] for result in response.json()["results"]] == ["invalid", "invalid"]
+    assert "colour" in response.json()["results"][0]["detail"]
+    assert db.execute("SELECT COUNT(*) FROM vehicles").fetchone() == (2,)
+
+
+async def test_constraint_violation_only_fails_its_item(client, admin_headers, db, vehicle_ids, reject_boom):
+    before = await summary_total(client, admin_headers)
+    response = await client.post("/vehicles/batch", json=[
+        {"op": "create", "data": {"type": "land", "model": "Batpod", "year": 2008}},
+        {"op": "create", "data": {"type": "land", "model": "boom", "year": 2008}},
+        {"op": "update", "id": vehicle_ids[0], "data": {"year": 2012}},
+        {"op": "delete", "id": vehicle_ids[1]},
+    ], headers=admin_headers)
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [result["status"] for result in results] == ["created", "invalid", "updated", "deleted"]
+    assert "boom rejected" in results[1]["detail"]
+    assert results[1]["id"] is None
+    models = [row[0] for row in db.execute("SELECT model FROM vehicles ORDER BY id")]
+    assert models == ["Tumbler", "Batpod"]
+    assert db.execute("SELECT year FROM vehicles WHERE id = ?", (vehicle_ids[0],)).fetchone() == (2012,)
+    # contadores só com o que foi gravado: +1 criado, -1 removido
+    assert before == 2
+    assert await summary_total(client, admin_headers) == before
+
+
+async def test_batch_stays_atomic_when_the_request_fails_later(client, admin_headers, db, vehicle_ids, reject_boom):
+    # nada gravado pelos savepoints escapa de um rollback da transação externa
+    from wayne_api.batch import apply_batch
+    from wayne_api.database import open_session
+    from wayne_api.models import Vehicle
+    from wayne_api.schemas import BatchOperation, VehicleBase, VehiclePartialUpdate
+
+    session = open_session()
+    try:
+        operations = [BatchOperation(op="create", data={"type": "land", "model": model, "year": 2000}) for model in ("a", "boom", "b")]
+        commit = session.commit
+        session.commit = session.rollback
+        await apply_batch(session, Vehicle, operations, VehicleBase, VehiclePartialUpdate)
+        session.commit = commit
+    finally:
+        await session.close()
+    assert db.execute("SELECT COUNT(*) FROM vehicles").fetchone() == (2,)
+
+
+async def test_row_removed_before_the_write_is_not_found(client, admin_headers, db, vehicle_ids, monkeypatch):
+    # outro writer remove as duas linhas entre a validação do lote e a transação de escrita
+    from wayne_api import batch
+    from wayne_api.etag import collection_versions
+
+    begin_write = batch.begin_write
+
+    async def concurrent_delete(session):
+        # direto no banco: no perfil production o lote já segura a conexão escritora da API
+        db.execute("DELETE FROM vehicles")
+        db.execute("UPDATE summary_counters SET value = value - 2 WHERE metric = 'total' AND bucket = 'vehicles'")
+        db.commit()
+        collection_versions.bump("vehicles")
+        await begin_write(session)
+
+    monkeypatch.setattr(batch, "begin_write", concurrent_delete)
+    response = await client.post("/vehicles/batch", json=[
+        {"op": "update", "id": vehicle_ids[0], "data": {"year": 2012}},
+        {"op": "delete", "id": vehicle_ids[1]},
+        {"op": "create", "data": {"type": "land", "model": "Batpod", "year": 2008}},
+    ], headers=admin_headers)
+    assert response.status_code == 200
+    assert [result["status"] for result in response.json()["results"]] == ["not_found", "not_found", "created"]
+    assert db.execute("SELECT COUNT(*) FROM vehicles").fetchone() == (1,)
+    assert await summary_total(client, admin_headers) == 1
@@ -0,0 +1,62 @@
+import pytest
+
+from wayne_api.compression import compressed_cache
+
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def vehicles(db):
+    # grande o bastante para passar de COMPRESSION_MIN_SIZE
+    db.executemany("INSERT INTO vehicles (type, model, year) VALUES (?, ?, ?)", [("land", f"Tumbler {i}", 2000 + i % 20) for i in range(100)])
+    db.commit()
+
+
+async def get(client, headers, encoding, if_none_match=None):
+    headers = {**headers, "Accept-Encoding": encoding}
+    if if_none_match:
+        headers["If-None-Match"] = if_none_match
+    return await client.get("/vehicles/", params={"count": "none", "limit": 100, "sort": "-id"}, headers=headers)
+
+
+async def test_each_encoding_has_its_own_etag(client, user_headers, vehicles):
+    identity = await get(client, user_headers, "identity")
+    gzip = await get(client, user_headers, "gzip")
+    assert "content-encoding" not in identity.headers
+    assert gzip.headers["content-encoding"] == "gzip"
+    assert gzip.headers["etag"] == identity.headers["etag"][:-1] + '-gzip"'
+    assert gzip.json() == identity.json()
+
+
+@pytest.mark.parametrize("sent, received", [("gzip", "gzip"), ("identity", "gzip"), ("gzip", "identity")])
+async def test_not_modified_across_encodings(client, user_headers, vehicles, sent, received):
+    etag = (await get(client, user_headers, sent)).headers["etag"]
+    response = await get(client, user_headers, received, if_none_match=etag)
+    assert response.status_code == 304
+    assert response.content == b""
+    # o 304 devolve o ETag que o cliente guardou, para ele achar a cópia em cache
+    assert response.headers["etag"] == etag
+
+
+async def test_weak_encoded_etag_matches(client, user_headers, vehicles):
+    etag = (await get(client, user_headers, "gzip")).headers["etag"]
+    assert (await get(client, user_headers, "gzip", if_none_match=f'"other", W/{etag}')).status_code == 304
+
+
+async def test_stale_encoded_etag_gets_the_new_body(client, user_headers, admin_headers, vehicles):
+    etag = (await get(client, user_headers, "gzip")).headers["etag"]
+    response = await client.post("/vehicles/", json={"type": "aerial", "model": "Batwing", "year": 1989}, headers=admin_headers)
+    assert response.status_code == 201
+    response = await get(client, user_headers, "gzip", if_none_match=etag)
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+    assert response.json()["vehicle"][0]["model"] == "Batwing"
+
+
+async def test_cache_keeps_one_body_per_encoding(client, user_headers, vehicles):
+    await get(client, user_headers, "gzip")
+    hits = compressed_cache.hits
+    second = await get(client, user_headers, "gzip")
+    assert compressed_cache.hits == hits + 1
+    assert second.headers["content-encoding"] == "gzip"
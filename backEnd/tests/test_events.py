@@ -0,0 +1,43 @@
+import logging
+
+import pytest
+
+from wayne_api.events import change_hub
+from wayne_api.routers.events_routers import stream_events
+
+
+pytestmark = pytest.mark.anyio
+
+
+def subscribers():
+    return change_hub.stats()["subscribers"]
+
+
+async def test_stream_subscribes_only_once_it_starts(client, user_headers):
+    before = subscribers()
+    response = await stream_events(token=user_headers["Authorization"].removeprefix("Bearer "), collections="vehicles", header_token=None)
+    # cliente que desconecta antes da primeira iteração: o gerador nunca roda
+    assert subscribers() == before
+    assert await response.body_iterator.__anext__() == "retry: 3000\n\n"
+    assert subscribers() == before + 1
+    await response.body_iterator.aclose()
+    assert subscribers() == before
+
+
+async def test_stream_rejects_bad_token_and_collections(client, user_headers):
+    assert (await client.get("/events/stream", params={"token": "nope"})).status_code == 401
+    response = await client.get("/events/stream", params={"collections": "villains"}, headers=user_headers)
+    assert response.status_code == 400
+
+
+@pytest.mark.parametrize("logger_name, message, args", [
+    ("uvicorn.access", '%s - "%s %s HTTP/%s" %d', ("127.0.0.1:5000", "GET", "/events/stream?token=secret.jwt&collections=vehicles", "1.1", 200)),
+    ("uvicorn.error", '%s - "WebSocket %s" [accepted]', ("127.0.0.1:5000", "/events/ws?collections=vehicles&token=secret.jwt")),
+])
+def test_query_token_is_redacted_from_logs(logger_name, message, args):
+    record = logging.LogRecord(logger_name, logging.INFO, __file__, 1, message, args, None)
+    assert logging.getLogger(logger_name).filter(record)
+    text = record.getMessage()
+    assert "secret.jwt" not in text
+    assert "token=[redacted]" in text
+    assert "collections=vehicles" in text
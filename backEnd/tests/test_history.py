@@ -0,0 +1,46 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+
+pytestmark = pytest.mark.anyio
+
+
+def utcnow():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+@pytest.fixture
+async def down_item(client, admin_headers):
+    response = await client.post("/equipment-safety/", json={"name": "rebreather", "status": False, "description": "sonar"}, headers=admin_headers)
+    return response.json()["id"]
+
+
+async def downtime(client, headers, start, end, **params):
+    response = await client.get("/equipment-safety/history/downtime", params={"start": start.isoformat(), "end": end.isoformat(), **params}, headers=headers)
+    assert response.status_code == 200
+    return response
+
+
+async def test_open_downtime_stops_at_now(client, user_headers, down_item):
+    start = utcnow() - timedelta(hours=1)
+    response = await downtime(client, user_headers, start, utcnow() + timedelta(days=1), equipment_id=down_item)
+    [item] = response.json()["items"]
+    # parado desde a criação (agora há pouco), não até o fim da janela amanhã
+    assert 0 <= item["down_seconds"] < 60
+    assert "ETag" not in response.headers
+
+
+async def test_window_in_the_future_counts_nothing(client, user_headers, down_item):
+    start = utcnow() + timedelta(days=1)
+    response = await downtime(client, user_headers, start, start + timedelta(days=1), equipment_id=down_item)
+    assert response.json()["items"] == [{"id": down_item, "down_seconds": 0.0}]
+
+
+async def test_finished_window_keeps_etag(client, user_headers, down_item):
+    start = utcnow() - timedelta(hours=2)
+    end = utcnow() - timedelta(hours=1)
+    response = await downtime(client, user_headers, start, end)
+    etag = response.headers["ETag"]
+    again = await client.get("/equipment-safety/history/downtime", params={"start": start.isoformat(), "end": end.isoformat()}, headers={**user_headers, "If-None-Match": etag})
+    assert again.status_code == 304
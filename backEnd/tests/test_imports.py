@@ -0,0 +1,63 @@
+import anyio
+import pytest
+
+from wayne_api import imports
+
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture(autouse=True)
+def small_chunks(monkeypatch):
+    # vários chunks mesmo em arquivos pequenos
+    monkeypatch.setattr(imports, "IMPORT_CHUNK_SIZE", 2)
+
+
+async def run_import(client, headers, body: str, format: str):
+    response = await client.post("/vehicles/import", params={"format": format}, content=body.encode(), headers=headers)
+    assert response.status_code == 202
+    assert response.headers["location"] == f"/imports/{response.json()['id']}"
+    with anyio.fail_after(10):
+        while True:
+            job = (await client.get(response.headers["location"], headers=headers)).json()
+            if job["status"] not in ("queued", "running"):
+                return job
+            await anyio.sleep(0.01)
+
+
+async def test_csv_import_reports_progress_and_error_rows(client, admin_headers, db):
+    body = "type,model,year\nland,Tumbler,2005\naerial,Batwing,not-a-year\nland,,2008\nwater,Batboat,1992\nland,Batpod,2008\n"
+    job = await run_import(client, admin_headers, body, "csv")
+    assert job["status"] == "done"
+    assert (job["rows_processed"], job["rows_inserted"], job["rows_failed"]) == (5, 3, 2)
+    # número da linha no arquivo, contando o cabeçalho
+    assert [error["row"] for error in job["errors"]] == [3, 4]
+    assert "year" in job["errors"][0]["detail"]
+    assert "model" in job["errors"][1]["detail"]
+    assert [row[0] for row in db.execute("SELECT model FROM vehicles ORDER BY id")] == ["Tumbler", "Batboat", "Batpod"]
+    summary = (await client.get("/summary/", headers=admin_headers)).json()
+    assert summary["totals"]["vehicles"] == 3
+
+
+async def test_ndjson_import_reports_unreadable_lines(client, admin_headers, db):
+    body = '{"type": "land", "model": "Tumbler", "year": 2005}\n\n{not json\n[1, 2]\n{"type": "land", "model": "Batpod", "year": 2008}\n'
+    job = await run_import(client, admin_headers, body, "ndjson")
+    assert job["status"] == "done"
+    assert (job["rows_processed"], job["rows_inserted"], job["rows_failed"]) == (4, 2, 2)
+    assert [error["row"] for error in job["errors"]] == [3, 4]
+    assert job["errors"][0]["detail"].startswith("invalid JSON")
+    assert job["errors"][1]["detail"] == "expected a JSON object"
+    assert db.execute("SELECT COUNT(*) FROM vehicles").fetchone() == (2,)
+
+
+async def test_error_list_is_capped(client, admin_headers, monkeypatch):
+    monkeypatch.setattr(imports, "IMPORT_MAX_ERRORS", 2)
+    body = "".join("{}\n" for _ in range(5))
+    job = await run_import(client, admin_headers, body, "ndjson")
+    assert job["rows_failed"] == 5
+    assert [error["row"] for error in job["errors"]] == [1, 2]
+
+
+async def test_import_requires_admin(client, user_headers):
+    response = await client.post("/vehicles/import", content=b'{"type": "land", "model": "Tumbler", "year": 2005}\n', headers=user_headers)
+    assert response.status_code == 403
@@ -0,0 +1,42 @@
+import pytest
+
+from wayne_api import dependencies
+
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_metrics_requires_authentication(client):
+    response = await client.get("/metrics")
+    assert response.status_code == 401
+    assert response.headers["WWW-Authenticate"] == "Bearer"
+
+
+async def test_metrics_is_admin_only(client, user_headers, admin_headers):
+    assert (await client.get("/metrics", headers=user_headers)).status_code == 403
+    response = await client.get("/metrics", headers=admin_headers)
+    assert response.status_code == 200
+    assert "wayne_user_cache_hits" in response.text
+
+
+async def test_metrics_accepts_scrape_token(client, monkeypatch):
+    monkeypatch.setattr(dependencies, "METRICS_TOKEN", "scrape-secret")
+    assert (await client.get("/metrics", headers={"Authorization": "Bearer scrape-secret"})).status_code == 200
+    assert (await client.get("/metrics", headers={"Authorization": "Bearer wrong"})).status_code == 401
+
+
+async def test_metrics_can_be_public(client, monkeypatch):
+    monkeypatch.setattr(dependencies, "METRICS_PUBLIC", True)
+    assert (await client.get("/metrics")).status_code == 200
+
+
+async def test_counters_and_gauges_are_typed(client, admin_headers):
+    text = (await client.get("/metrics", headers=admin_headers)).text
+    types = dict(line.split()[2:4] for line in text.splitlines() if line.startswith("# TYPE"))
+    assert types["wayne_user_cache_hits_total"] == "counter"
+    assert types["wayne_write_behind_dropped_total"] == "counter"
+    assert types["wayne_write_behind_pending"] == "gauge"
+    assert types["wayne_compression_cache_bytes"] == "gauge"
+    # todo contador termina em _total, e nenhum gauge
+    for name, kind in types.items():
+        assert name.endswith("_total") == (kind == "counter"), name
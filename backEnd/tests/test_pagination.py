@@ -0,0 +1,113 @@
+import pytest
+from sqlalchemy import event
+
+from wayne_api.database import SessionLocal, sync_engines
+from wayne_api.summary import rebuild_counters
+
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def vehicles(db):
+    # anos NULL só entram direto no banco; a API sempre exige year
+    rows = [("land", f"m{i}", None if i % 5 == 0 else 1990 + i % 7) for i in range(1, 61)]
+    db.executemany("INSERT INTO vehicles (type, model, year) VALUES (?, ?, ?)", rows)
+    db.commit()
+    with SessionLocal() as session:
+        rebuild_counters(session)
+
+
+@pytest.fixture
+def statements():
+    captured = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        captured.append((statement, parameters))
+
+    for engine in sync_engines():
+        event.listen(engine, "before_cursor_execute", capture)
+    yield captured
+    for engine in sync_engines():
+        event.remove(engine, "before_cursor_execute", capture)
+
+
+async def walk(client, headers, **params):
+    ids, cursor = [], None
+    while True:
+        page_params = {**params, "fields": "id,year", "count": "none", "limit": 7}
+        if cursor:
+            page_params["after"] = cursor
+        response = await client.get("/vehicles/", params=page_params, headers=headers)
+        assert response.status_code == 200
+        body = response.json()
+        ids += [vehicle["id"] for vehicle in body["vehicle"]]
+        cursor = body["next_cursor"]
+        if cursor is None:
+            return ids
+
+
+@pytest.mark.parametrize("sort, order", [
+    ("year", "year IS NOT NULL, year, id"),
+    ("-year", "year IS NULL, year DESC, id DESC"),
+    ("id", "id"),
+    ("-id", "id DESC"),
+])
+async def test_keyset_crosses_null_boundary(client, user_headers, db, vehicles, sort, order):
+    expected = [row[0] for row in db.execute(f"SELECT id FROM vehicles ORDER BY {order}")]
+    assert await walk(client, user_headers, sort=sort) == expected
+
+
+async def test_keyset_with_year_filter(client, user_headers, db, vehicles):
+    expected = [row[0] for row in db.execute("SELECT id FROM vehicles WHERE year >= 1994 ORDER BY id DESC")]
+    assert await walk(client, user_headers, sort="-id", year_min=1994) == expected
+
+
+@pytest.mark.parametrize("sort", ["year", "-year"])
+async def test_keyset_pages_seek_the_index(client, user_headers, db, vehicles, statements, sort):
+    await walk(client, user_headers, sort=sort)
+    keyset = [(sql, params) for sql, params in statements if "FROM vehicles" in sql and "WHERE" in sql and "ORDER BY" in sql]
+    assert keyset
+    for sql, params in keyset:
+        plan = " ".join(row[3] for row in db.execute("EXPLAIN QUERY PLAN " + sql, params))
+        assert plan.startswith("SEARCH"), plan
+
+
+async def test_narrow_year_range_seeks_year_index(client, user_headers, db, vehicles, statements):
+    await client.get("/vehicles/", params={"year_min": 1996, "count": "none", "fields": "id,year"}, headers=user_headers)
+    sql, params = [(sql, params) for sql, params in statements if "FROM vehicles" in sql and "ORDER BY" in sql][-1]
+    plan = " ".join(row[3] for row in db.execute("EXPLAIN QUERY PLAN " + sql, params))
+    assert "ix_vehicles_year" in plan, plan
+
+
+def forged(**values):
+    from wayne_api.pagination import encode_cursor
+
+    return encode_cursor(values)
+
+
+async def test_cursor_from_another_sort_is_rejected(client, user_headers, vehicles):
+    page = (await client.get("/vehicles/", params={"sort": "id", "limit": 5, "fields": "id,year"}, headers=user_headers)).json()
+    response = await client.get("/vehicles/", params={"sort": "-year", "after": page["next_cursor"], "fields": "id,year"}, headers=user_headers)
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid cursor"
+
+
+@pytest.mark.parametrize("cursor", [
+    forged(s="year", id=3),
+    forged(s="year", id=3, v="1995"),
+    forged(s="year", id=3, v=True),
+    forged(s="year", id=3, v=1995.5),
+    forged(s="year", id=3, v=[1995]),
+    forged(s="year", id="3", v=1995),
+    forged(id=3, v=1995),
+    "not-a-cursor",
+])
+async def test_malformed_cursor_is_rejected(client, user_headers, vehicles, cursor):
+    response = await client.get("/vehicles/", params={"sort": "year", "after": cursor, "fields": "id,year"}, headers=user_headers)
+    assert response.status_code == 400
+
+
+async def test_cursor_in_null_region_is_accepted(client, user_headers, vehicles):
+    response = await client.get("/vehicles/", params={"sort": "year", "after": forged(s="year", id=0, v=None), "fields": "id,year"}, headers=user_headers)
+    assert response.status_code == 200
@@ -0,0 +1,38 @@
+import pytest
+
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def item(client, admin_headers):
+    response = await client.post("/equipment-safety/", json={"name": "grapple gun", "status": True, "description": "zipline"}, headers=admin_headers)
+    assert response.status_code == 201
+    return response.json()["id"]
+
+
+def fts_segments(db):
+    # segmentos do índice: qualquer 'delete' + insert no FTS5 grava blocos novos aqui
+    return db.execute("SELECT rowid, block FROM equipment_safety_fts_data ORDER BY rowid").fetchall()
+
+
+async def search(client, headers, q):
+    response = await client.get("/search/", params={"q": q, "kind": "equipment_safety"}, headers=headers)
+    assert response.status_code == 200
+    return [hit["id"] for hit in response.json()["hits"]]
+
+
+async def test_status_update_leaves_fts_untouched(client, admin_headers, db, item):
+    before = fts_segments(db)
+    response = await client.patch(f"/equipment-safety/{item}", json={"status": False}, headers=admin_headers, params={"wait": "flushed"})
+    assert response.status_code == 200
+    assert db.execute("SELECT status FROM equipment_safety WHERE id = ?", (item,)).fetchone() == (0,)
+    assert fts_segments(db) == before
+
+
+async def test_name_update_is_searchable(client, admin_headers, item):
+    response = await client.patch(f"/equipment-safety/{item}", json={"name": "cryo shield"}, headers=admin_headers, params={"wait": "flushed"})
+    assert response.status_code == 200
+    assert await search(client, admin_headers, "cryo") == [item]
+    assert await search(client, admin_headers, "grapple") == []
+    assert await search(client, admin_headers, "zipline") == [item]
@@ -0,0 +1,88 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from wayne_api import writebehind
+from wayne_api.models import EquipmentSafety
+from wayne_api.routers import equipment_safety_routers
+from wayne_api.schemas import EquipmentSafetyPublic
+from wayne_api.writebehind import WriteBehindQueue, equipment_safety_writes
+
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def item_ids(db):
+    db.executemany("INSERT INTO equipment_safety (name, status, description) VALUES (?, ?, ?)", [(f"cowl {i}", True, "kevlar") for i in range(3)])
+    db.commit()
+    return [row[0] for row in db.execute("SELECT id FROM equipment_safety ORDER BY id")]
+
+
+@pytest.fixture
+def queue():
+    return WriteBehindQueue(EquipmentSafety, EquipmentSafetyPublic, "equipment_safety", flush_ms=1, max_batch=100, max_pending=100, max_attempts=2)
+
+
+async def test_invalid_patch_is_rejected_before_queueing(client, admin_headers, item_ids, monkeypatch):
+    monkeypatch.setattr(equipment_safety_routers, "WRITE_BEHIND_ENABLED", True)
+    response = await client.patch(f"/equipment-safety/{item_ids[0]}", json={"name": None}, headers=admin_headers)
+    assert response.status_code == 422
+    assert "name" in response.json()["detail"]
+    assert equipment_safety_writes.pending == 0
+
+    response = await client.patch(f"/equipment-safety/{item_ids[0]}", json={"status": False}, headers=admin_headers, params={"wait": "queued"})
+    assert response.status_code == 202
+    assert response.json()["status"] is False
+    assert equipment_safety_writes.pending == 1
+    await equipment_safety_writes.flush()
+
+
+async def test_patch_waits_for_the_flush_by_default(client, admin_headers, db, item_ids, monkeypatch):
+    monkeypatch.setattr(equipment_safety_routers, "WRITE_BEHIND_ENABLED", True)
+    equipment_safety_writes.start()
+    try:
+        response = await client.patch(f"/equipment-safety/{item_ids[0]}", json={"status": False}, headers=admin_headers)
+    finally:
+        await equipment_safety_writes.stop()
+    # resposta 200 só depois do commit: a escrita confirmada já está no banco
+    assert response.status_code == 200
+    assert db.execute("SELECT status FROM equipment_safety WHERE id = ?", (item_ids[0],)).fetchone() == (0,)
+
+
+async def test_poison_write_does_not_block_the_batch(client, db, item_ids, queue, caplog, monkeypatch):
+    # o fileConfig do alembic (migração no pytest_configure) desliga os loggers já criados
+    monkeypatch.setattr(writebehind.logger, "disabled", False)
+    poison = queue.submit(item_ids[0], {"name": None})
+    valid = [queue.submit(item_id, {"status": False}) for item_id in item_ids[1:]]
+
+    assert await queue.flush() is False
+    assert [future.result()["status"] for future in valid] == [False, False]
+    assert db.execute("SELECT COUNT(*) FROM equipment_safety WHERE status = 0").fetchone() == (2,)
+    # o envenenado volta para a fila uma vez (max_attempts=2) e depois é descartado com erro
+    assert not poison.done() and queue.pending == 1
+    assert await queue.flush() is False
+    assert queue.pending == 0 and queue.dropped == 1
+    with pytest.raises(HTTPException) as error:
+        await poison
+    assert error.value.status_code == 500
+    assert db.execute("SELECT name FROM equipment_safety WHERE id = ?", (item_ids[0],)).fetchone() == ("cowl 0",)
+    # o log de erro é o único registro do que foi descartado: id e campos
+    dropped = [record.getMessage() for record in caplog.records if "Dropping write-behind" in record.getMessage()]
+    assert len(dropped) == 1
+    assert f"equipment_safety {item_ids[0]} " in dropped[0] and "fields={'name': None}" in dropped[0]
+    assert await queue.flush() is True
+
+
+async def test_failed_flushes_back_off(client, item_ids, queue):
+    queue.submit(item_ids[0], {"name": None}, wait=False)
+    queue.start()
+    for _ in range(200):
+        if queue.dropped:
+            break
+        await asyncio.sleep(0.01)
+    await asyncio.sleep(0.05)
+    # duas tentativas e o descarte; depois a fila para de tentar em vez de girar em falso
+    assert queue.failures == 2 and queue.dropped == 1
+    await queue.stop()
@@ -1,16 +1,58 @@
+import asyncio
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
+from fastapi.responses import JSONResponse, ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 
 from wayne_api.routers.equipment_routers import router as equipment_routers
 from wayne_api.routers.equipment_safety_routers import router as equipment_safety_routers
 from wayne_api.routers.vehicles_routers import router as vehicles_routers
 from wayne_api.routers.auth_routers import router as auth_routers
+from wayne_api.routers.search_routers import router as search_routers
+from wayne_api.routers.summary_routers import router as summary_routers
+from wayne_api.routers.events_routers import router as events_routers
+from wayne_api.routers.metrics_routers import router as metrics_routers
+from wayne_api.routers.imports_routers import router as imports_routers
+from wayne_api.passwords import password_pool
+from wayne_api.database import dispose_engines, sync_engines
+from wayne_api.metrics import MetricsMiddleware, instrument_engines
+from wayne_api.compression import CompressionMiddleware
+from wayne_api.etag import collection_versions
+from wayne_api.events import change_hub
+from wayne_api.warmup import mark_ready, warm_up
+from wayne_api.writebehind import equipment_safety_writes
+from wayne_api.history import compact_periodically
+from wayne_api.imports import stop_imports
+from wayne_api.settings import METRICS_ENABLED, COMPRESSION_ENABLED, FAST_JSON, WARMUP_ON_STARTUP, EVENTS_POLL_SECONDS, WRITE_BEHIND_ENABLED, HISTORY_COMPACT_INTERVAL_SECONDS
+
+
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    mark_ready(await warm_up() if WARMUP_ON_STARTUP else 0.0)
+    # com vários workers, avisa os assinantes de /events sobre escritas feitas em outros processos
+    watcher = asyncio.create_task(change_hub.watch_shared_versions(EVENTS_POLL_SECONDS)) if collection_versions.shared else None
+    if WRITE_BEHIND_ENABLED:
+        equipment_safety_writes.start()
+    compactor = asyncio.create_task(compact_periodically(HISTORY_COMPACT_INTERVAL_SECONDS)) if HISTORY_COMPACT_INTERVAL_SECONDS > 0 else None
+    yield
+    for task in (watcher, compactor):
+        if task is not None:
+            task.cancel()
+    # grava o que ainda está na fila antes de fechar os engines
+    await equipment_safety_writes.stop()
+    await stop_imports()
+    change_hub.close()
+    password_pool.shutdown()
+    await dispose_engines()
 
 
 app = FastAPI(
     tittle="Wayne API",
     description="API for Wayne Project",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse if FAST_JSON else JSONResponse,
 )
 
 # Habilita CORS para desenvolvimento local (ajuste origens em produção)
@@ -20,13 +62,27 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Total-Count", "X-Total-Count-Estimated"],
 )
 
+# dentro do middleware de métricas: o tempo de compressão entra na latência medida
+if COMPRESSION_ENABLED:
+    app.add_middleware(CompressionMiddleware)
+
+if METRICS_ENABLED:
+    instrument_engines(sync_engines())
+    app.add_middleware(MetricsMiddleware)
+
 
 
 app.include_router(equipment_routers)
 app.include_router(equipment_safety_routers)
 app.include_router(vehicles_routers)
 app.include_router(auth_routers)
+app.include_router(search_routers)
+app.include_router(summary_routers)
+app.include_router(events_routers)
+app.include_router(metrics_routers)
+app.include_router(imports_routers)
 
 
@@ -0,0 +1,160 @@
+from collections import Counter
+from functools import cache
+
+from fastapi import HTTPException, status
+from pydantic import ValidationError
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.exc import IntegrityError
+
+from wayne_api.database import begin_write
+from wayne_api.settings import BATCH_MAX_SIZE
+from wayne_api.summary import apply_counter_deltas, counter_deltas, tracked_columns
+
+
+def validation_detail(exc: ValidationError) -> str:
+    return "; ".join(f"{'.'.join(map(str, error['loc']))}: {error['msg']}" for error in exc.errors())
+
+
+@cache
+def _strict(schema):
+    # no batch uma chave desconhecida é erro do item, não um campo ignorado em silêncio
+    return type(schema.__name__, (schema,), {"model_config": {**schema.model_config, "extra": "forbid"}})
+
+
+def _null_detail(model, values: dict):
+    """Explicit nulls for NOT NULL columns (the partial-update schemas accept None for every field)."""
+    columns = model.__table__.columns
+    fields = [key for key, value in values.items() if value is None and not columns[key].nullable]
+    return "; ".join(f"{field}: may not be null" for field in fields) or None
+
+
+async def _write_each(session, writes):
+    """Runs each (result, statement, params) in its own SAVEPOINT; failures become the item's error."""
+    for result, statement, params in writes:
+        savepoint = await session.begin_nested()
+        try:
+            outcome = await session.execute(statement, params) if params is not None else await session.execute(statement)
+            if result["status"] == "created":
+                result["id"] = outcome.scalar_one()
+            await savepoint.commit()
+        except IntegrityError as exc:
+            await savepoint.rollback()
+            result["status"] = "invalid"
+            result["detail"] = str(exc.orig)
+
+
+async def apply_batch(session, model, operations, create_schema, update_schema):
+    """Applies a list of BatchOperation in a single transaction with bulk statements.
+
+    Invalid items (unknown keys, nulls for required fields, constraint violations) and
+    unknown ids are reported per item and skipped; the remaining creates, updates and
+    deletes are committed together. The writes go out as bulk statements; only when
+    those fail is each item retried in its own SAVEPOINT to find the ones at fault.
+    Items are validated before the write transaction opens; the existence check and
+    the counter snapshot are read inside it.
+    """
+    if len(operations) > BATCH_MAX_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Batch size exceeds the limit of {BATCH_MAX_SIZE} operations",
+        )
+
+    results = []
+    valid = []
+    for index, operation in enumerate(operations):
+        result = {"index": index, "op": operation.op, "id": operation.id, "status": None, "detail": None}
+        results.append(result)
+        try:
+            if operation.op == "create":
+                values = _strict(create_schema)(**(operation.data or {})).model_dump()
+            elif operation.op == "update":
+                values = _strict(update_schema)(**(operation.data or {})).model_dump(exclude_unset=True)
+            else:
+                values = {}
+        except ValidationError as exc:
+            result["status"] = "invalid"
+            result["detail"] = validation_detail(exc)
+            continue
+        null_detail = _null_detail(model, values)
+        if null_detail:
+            result["status"] = "invalid"
+            result["detail"] = null_detail
+            continue
+        if operation.op != "create" and operation.id is None:
+            result["status"] = "invalid"
+            result["detail"] = "id is required"
+            continue
+        valid.append((result, operation, values))
+
+    # o snapshot dos ids e as escritas ficam na mesma transação de escrita: ninguém
+    # remove ou altera uma linha entre a leitura e o UPDATE/DELETE (nem os contadores)
+    await begin_write(session)
+    target_ids = {operation.id for _, operation, _ in valid if operation.op != "create"}
+    existing = {}
+    if target_ids:
+        rows = await session.execute(select(model.id, *tracked_columns(model)).where(model.id.in_(target_ids)))
+        existing = {row["id"]: dict(row) for row in rows.mappings()}
+
+    creates = []
+    updates = {}
+    deletes = {}
+    for result, operation, values in valid:
+        if operation.op == "create":
+            creates.append((result, values))
+            result["status"] = "created"
+            continue
+        if operation.id not in existing:
+            result["status"] = "not_found"
+            continue
+        if operation.op == "update":
+            # várias atualizações do mesmo id viram uma só, com a última palavra de cada campo
+            updates.setdefault(operation.id, ({}, []))
+            updates[operation.id][0].update(values)
+            updates[operation.id][1].append(result)
+            result["status"] = "updated"
+        else:
+            deletes.setdefault(operation.id, []).append(result)
+            result["status"] = "deleted"
+
+    # uma atualização de um id removido no mesmo lote não vai ao banco
+    update_rows = {item_id: entry for item_id, entry in updates.items() if entry[0] and item_id not in deletes}
+
+    savepoint = await session.begin_nested()
+    try:
+        if creates:
+            new_ids = await session.scalars(
+                insert(model).returning(model.id, sort_by_parameter_order=True),
+                [values for _, values in creates],
+            )
+            for (result, _), new_id in zip(creates, new_ids.all()):
+                result["id"] = new_id
+        if update_rows:
+            await session.execute(update(model), [{"id": item_id, **values} for item_id, (values, _) in update_rows.items()])
+        if deletes:
+            await session.execute(delete(model).where(model.id.in_(deletes)))
+        await savepoint.commit()
+    except IntegrityError:
+        await savepoint.rollback()
+        writes = [(result, insert(model).returning(model.id), values) for result, values in creates]
+        writes += [(results_of_id[0], update(model).where(model.id == item_id).values(**values), None) for item_id, (values, results_of_id) in update_rows.items()]
+        writes += [(results_of_id[0], delete(model).where(model.id == item_id), None) for item_id, results_of_id in deletes.items()]
+        await _write_each(session, writes)
+        # o erro de um id vale para todas as operações do lote sobre ele
+        for results_of_id in [entry[1] for entry in update_rows.values()] + list(deletes.values()):
+            for result in results_of_id[1:]:
+                result["status"], result["detail"] = results_of_id[0]["status"], results_of_id[0]["detail"]
+
+    table = model.__tablename__
+    deltas = Counter()
+    for result, values in creates:
+        if result["status"] == "created":
+            counter_deltas(table, after=values, deltas=deltas)
+    for item_id, (values, results_of_id) in update_rows.items():
+        if results_of_id[0]["status"] == "updated":
+            counter_deltas(table, before=existing[item_id], after={**existing[item_id], **values}, deltas=deltas)
+    for item_id, results_of_id in deletes.items():
+        if results_of_id[0]["status"] == "deleted":
+            counter_deltas(table, before=existing[item_id], deltas=deltas)
+    await apply_counter_deltas(session, deltas)
+    await session.commit()
+    return {"results": results}
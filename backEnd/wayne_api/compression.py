@@ -0,0 +1,227 @@
+import zlib
+from collections import OrderedDict
+
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    import brotli
+except ImportError:  # opcional: pip install brotli
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # opcional: pip install zstandard
+    zstandard = None
+
+from wayne_api.etag import encoded_etag
+from wayne_api.settings import (
+    COMPRESSION_ENCODINGS, COMPRESSION_MIN_SIZE, COMPRESSION_GZIP_LEVEL,
+    COMPRESSION_BROTLI_QUALITY, COMPRESSION_ZSTD_LEVEL, COMPRESSION_CACHE_BYTES,
+)
+
+
+COMPRESSIBLE_TYPES = ("text/", "application/json", "application/x-ndjson", "application/javascript", "application/xml")
+
+
+class _GzipStream:
+    def __init__(self):
+        self._compressor = zlib.compressobj(COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        # Z_SYNC_FLUSH: cada pedaço do stream chega ao cliente sem esperar o próximo
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+class _BrotliStream:
+    def __init__(self):
+        self._compressor = brotli.Compressor(quality=COMPRESSION_BROTLI_QUALITY)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data) + self._compressor.flush()
+
+    def finish(self) -> bytes:
+        return self._compressor.finish()
+
+
+class _ZstdStream:
+    def __init__(self):
+        self._compressor = zstandard.ZstdCompressor(level=COMPRESSION_ZSTD_LEVEL).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+def _set_encoding(headers: MutableHeaders, encoding: str):
+    headers["Content-Encoding"] = encoding
+    headers.add_vary_header("Accept-Encoding")
+    # cada encoding é outra representação: o ETag forte não pode ser o mesmo do corpo original
+    if "etag" in headers:
+        headers["ETag"] = encoded_etag(headers["etag"], encoding)
+
+
+def _compress_gzip(body: bytes) -> bytes:
+    return zlib.compress(body, COMPRESSION_GZIP_LEVEL, wbits=31)
+
+
+ENCODERS = {"gzip": (_compress_gzip, _GzipStream)}
+if brotli is not None:
+    ENCODERS["br"] = (lambda body: brotli.compress(body, quality=COMPRESSION_BROTLI_QUALITY), _BrotliStream)
+if zstandard is not None:
+    ENCODERS["zstd"] = (lambda body: zstandard.ZstdCompressor(level=COMPRESSION_ZSTD_LEVEL).compress(body), _ZstdStream)
+
+# ordem de preferência do servidor, só com o que está instalado
+AVAILABLE_ENCODINGS = [name for name in COMPRESSION_ENCODINGS if name in ENCODERS]
+
+
+def negotiate(accept_encoding: str, available=None):
+    """Picks the first server-preferred encoding the client accepts (q > 0), or None."""
+    available = AVAILABLE_ENCODINGS if available is None else available
+    accepted = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip().lower()] = quality
+    for name in available:
+        if accepted.get(name, accepted.get("*", 0.0)) > 0:
+            return name
+    return None
+
+
+class CompressedBodyCache:
+    """LRU of compressed bodies keyed by (ETag, encoding), bounded by total bytes."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+
+    def get(self, key):
+        body = self._data.get(key)
+        if body is None:
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return body
+
+    def set(self, key, body: bytes):
+        if len(body) > self.max_bytes:
+            return
+        previous = self._data.pop(key, None)
+        if previous is not None:
+            self.bytes -= len(previous)
+        self._data[key] = body
+        self.bytes += len(body)
+        while self.bytes > self.max_bytes:
+            _, evicted = self._data.popitem(last=False)
+            self.bytes -= len(evicted)
+
+    def stats(self):
+        return {"entries": len(self._data), "bytes": self.bytes, "max_bytes": self.max_bytes, "hits": self.hits, "misses": self.misses}
+
+
+compressed_cache = CompressedBodyCache(COMPRESSION_CACHE_BYTES)
+
+
+class CompressionMiddleware:
+    """ASGI middleware compressing responses with the best encoding the client accepts.
+
+    Whole bodies under COMPRESSION_MIN_SIZE go out as they are. Bodies with an ETag are
+    compressed once and served from ``compressed_cache`` afterwards (the ETag changes with
+    the collection version, so entries never go stale). Streaming responses (exports) are
+    compressed chunk by chunk; event streams are left alone. Encoded responses get the
+    encoding appended to their ETag (``"<tag>-gzip"``); ``conditional_get`` accepts
+    every suffixed form of the current version.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start = None
+        stream = None
+        passthrough = False
+
+        async def send_compressed(message):
+            nonlocal start, stream, passthrough
+            if passthrough:
+                await send(message)
+                return
+            if message["type"] == "http.response.start":
+                start = message
+                headers = Headers(raw=message["headers"])
+                content_type = headers.get("content-type", "")
+                if (
+                    "content-encoding" in headers
+                    or message["status"] < 200 or message["status"] in (204, 304)
+                    or not content_type.startswith(COMPRESSIBLE_TYPES)
+                    or content_type.startswith("text/event-stream")
+                ):
+                    passthrough = True
+                    await send(start)
+                return
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            headers = MutableHeaders(scope=start)
+            if stream is None and not more_body:
+                if len(body) < COMPRESSION_MIN_SIZE:
+                    passthrough = True
+                    await send(start)
+                    await send(message)
+                    return
+                # só respostas 200 entram no cache: o ETag identifica o corpo da listagem/item
+                etag = headers.get("etag") if start["status"] == 200 else None
+                compressed = compressed_cache.get((etag, encoding)) if etag and COMPRESSION_CACHE_BYTES else None
+                if compressed is None:
+                    compressed = ENCODERS[encoding][0](body)
+                    if etag and COMPRESSION_CACHE_BYTES:
+                        compressed_cache.set((etag, encoding), compressed)
+                headers["Content-Length"] = str(len(compressed))
+                _set_encoding(headers, encoding)
+                await send(start)
+                await send({"type": "http.response.body", "body": compressed})
+                return
+
+            if stream is None:
+                length = headers.get("content-length")
+                if length is not None and int(length) < COMPRESSION_MIN_SIZE:
+                    passthrough = True
+                    await send(start)
+                    await send(message)
+                    return
+                stream = ENCODERS[encoding][1]()
+                del headers["Content-Length"]
+                _set_encoding(headers, encoding)
+                await send(start)
+            chunk = stream.compress(body) if body else b""
+            if not more_body:
+                chunk += stream.finish()
+            await send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+
+        await self.app(scope, receive, send_compressed)
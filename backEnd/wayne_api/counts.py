@@ -0,0 +1,112 @@
+from fastapi import Response
+from sqlalchemy import func, select
+
+from wayne_api.cache import TTLCache
+from wayne_api.etag import collection_versions
+from wayne_api.summary import read_summary, status_bucket
+from wayne_api.settings import COUNT_CACHE_MAX_SIZE, COUNT_CACHE_TTL_SECONDS, COUNT_ESTIMATE_SCAN_LIMIT
+
+
+# (coleção, versão, modo, filtros) -> (total, exato); a versão muda a cada escrita, então nada fica velho
+count_cache = TTLCache(max_size=COUNT_CACHE_MAX_SIZE, ttl=COUNT_CACHE_TTL_SECONDS)
+
+
+def _decades_in_range(by_year: dict, year_min, year_max):
+    """Rows of the decade buckets overlapping [year_min, year_max], pro-rated by overlap."""
+    total = 0.0
+    exact = True
+    for bucket, value in by_year.items():
+        if bucket == "unknown":
+            continue  # ano NULL nunca passa num filtro de ano
+        first = int(bucket)
+        low = max(first, year_min if year_min is not None else first)
+        high = min(first + 9, year_max if year_max is not None else first + 9)
+        if high < low:
+            continue
+        fraction = (high - low + 1) / 10
+        exact = exact and fraction == 1
+        total += value * fraction
+    return round(total), exact
+
+
+def _estimate_vehicles(summary, filters):
+    if not set(filters) <= {"type", "year_min", "year_max"}:
+        return None
+    total = summary["totals"].get("vehicles", 0)
+    estimate, exact = total, True
+    if "type" in filters:
+        estimate = summary["vehicles_by_type"].get(filters["type"], 0)
+        exact = filters["type"] != "unknown"  # o bucket "unknown" junta type NULL e o texto "unknown"
+    if "year_min" in filters or "year_max" in filters:
+        in_range, range_exact = _decades_in_range(summary["vehicles_by_year"], filters.get("year_min"), filters.get("year_max"))
+        if "type" in filters:
+            # supõe tipo e ano independentes
+            estimate = round(estimate * in_range / total) if total else 0
+            exact = False
+        else:
+            estimate, exact = in_range, range_exact
+    return estimate, exact
+
+
+def _estimate_equipment_safety(summary, filters):
+    if set(filters) != {"status"}:
+        return None
+    return summary["equipment_safety_by_status"].get(status_bucket(filters["status"]), 0), True
+
+
+# estimativas a partir dos contadores do /summary, para os filtros que batem com os buckets
+ESTIMATORS = {
+    "vehicles": _estimate_vehicles,
+    "equipment_safety": _estimate_equipment_safety,
+}
+
+
+async def estimated_rows(session, collection: str, filters: dict):
+    """Rows matching ``filters`` estimated from the /summary counters, or None when no bucket fits."""
+    estimator = ESTIMATORS.get(collection)
+    filters = {key: value for key, value in filters.items() if value is not None}
+    if estimator is None or not filters:
+        return None
+    estimate = estimator(await read_summary(session), filters)
+    return None if estimate is None else estimate[0]
+
+
+async def _count(session, collection: str, model, query, filters: dict, mode: str):
+    if not filters:
+        summary = await read_summary(session)
+        return summary["totals"].get(collection, 0), True
+    if mode == "exact":
+        return await session.scalar(query.with_only_columns(func.count(), maintain_column_froms=True).order_by(None)), True
+    estimator = ESTIMATORS.get(collection)
+    if estimator is not None:
+        estimate = estimator(await read_summary(session), filters)
+        if estimate is not None:
+            return estimate
+    # sem bucket que sirva: conta até COUNT_ESTIMATE_SCAN_LIMIT linhas
+    limited = query.with_only_columns(model.id).order_by(None).limit(COUNT_ESTIMATE_SCAN_LIMIT).subquery()
+    counted = await session.scalar(select(func.count()).select_from(limited))
+    return counted, counted < COUNT_ESTIMATE_SCAN_LIMIT
+
+
+async def list_total(session, collection: str, model, query, filters: dict, mode: str, response: Response):
+    """Total rows of a list (``query`` is the filtered select, before pagination), cached per collection version.
+
+    Unfiltered totals come from the /summary counters; filtered ones are exact
+    (COUNT(*)) or estimated from the counters / a bounded count. Sets X-Total-Count
+    (plus X-Total-Count-Estimated when not exact) and returns the total, or None
+    when ``mode`` is "none".
+    """
+    if mode == "none":
+        return None
+    filters = {key: value for key, value in filters.items() if value is not None}
+    # versão lida antes da contagem: uma escrita no meio só faz a entrada nascer já velha, nunca errada
+    key = (collection, collection_versions.version(collection), mode if filters else "exact", tuple(sorted(filters.items())))
+    cached = count_cache.get(key)
+    if cached is None:
+        cached = await _count(session, collection, model, query, filters, mode)
+        count_cache.set(key, cached)
+    total, exact = cached
+    response.headers["X-Total-Count"] = str(total)
+    if not exact:
+        response.headers["X-Total-Count-Estimated"] = "true"
+    return total
@@ -1,20 +1,204 @@
-from sqlalchemy import create_engine
+import asyncio
+from functools import partial
+
+from sqlalchemy import create_engine, event, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import HTTPConnection
+
+from wayne_api.settings import (
+    DATABASE_MODE, DATABASE_URL, ASYNC_DATABASE_URL, DATABASE_PROFILE,
+    SQLITE_BUSY_TIMEOUT_MS, SQLITE_MMAP_SIZE, SQLITE_CACHE_SIZE, SQLITE_READ_POOL_SIZE,
+)
+
+
+READ_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record, read_only=False):
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+    cursor.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+    cursor.execute(f"PRAGMA cache_size={SQLITE_CACHE_SIZE}")
+    if read_only:
+        cursor.execute("PRAGMA query_only=ON")
+    cursor.close()
 
 
-DATABASE_URL = "sqlite:///./wayne.db"
+def _create_engines(create, url):
+    """Returns (writer, reader) engines for the configured storage profile.
 
+    The production profile serializes writes through a single pooled connection and
+    serves reads from a separate query_only pool; otherwise both are the same engine.
+    """
+    if DATABASE_PROFILE != "production":
+        engine = create(url)
+        return engine, engine
+    writer = create(url, pool_size=1, max_overflow=0)
+    reader = create(url, pool_size=SQLITE_READ_POOL_SIZE, max_overflow=0)
+    event.listen(getattr(writer, "sync_engine", writer), "connect", _set_sqlite_pragmas)
+    event.listen(getattr(reader, "sync_engine", reader), "connect", partial(_set_sqlite_pragmas, read_only=True))
+    return writer, reader
 
 
-engine = create_engine(DATABASE_URL)
+def _pool_slots(engine):
+    pool = engine.pool
+    return asyncio.Semaphore(pool.size() + getattr(pool, "_max_overflow", 0))
+
+
+engine, read_engine = _create_engines(create_engine, DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+session_slots = _pool_slots(engine)
+read_session_slots = session_slots if read_engine is engine else _pool_slots(read_engine)
+
+if DATABASE_MODE == "async":
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+    async_engine, async_read_engine = _create_engines(create_async_engine, ASYNC_DATABASE_URL)
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+    AsyncReadSessionLocal = async_sessionmaker(async_read_engine, autoflush=False, expire_on_commit=False)
 
 Base = declarative_base()
 
-def get_session():
-    session = SessionLocal()
+
+class SyncStreamResult:
+    """Async iteration over a sync server-side Result, fetching each partition in the threadpool."""
+
+    def __init__(self, result):
+        self.result = result
+
+    async def partitions(self, size=None):
+        partitions = self.result.partitions(size)
+        while True:
+            partition = await run_in_threadpool(next, partitions, None)
+            if partition is None:
+                break
+            yield partition
+
+
+class SyncTransaction:
+    """Async commit/rollback of a sync SessionTransaction (e.g. a SAVEPOINT), same interface as AsyncSessionTransaction."""
+
+    def __init__(self, session, transaction):
+        self._session = session
+        self.transaction = transaction
+
+    async def commit(self):
+        await self._session._run(self.transaction.commit)
+
+    async def rollback(self):
+        await self._session._run(self.transaction.rollback)
+
+
+class SyncSession:
+    """Wraps a sync Session behind the AsyncSession API, running each DB call in the threadpool.
+
+    ``slots`` is an asyncio.Semaphore sized to the engine's pool. It is acquired on the
+    event loop before the first DB call and released on close, so threadpool workers
+    never block on pool checkout while the sessions holding connections wait for a thread.
+    """
+
+    def __init__(self, sync_session, slots):
+        self.sync_session = sync_session
+        self._slots = slots
+        self._holding_slot = False
+
+    async def _run(self, func, *args, **kwargs):
+        if not self._holding_slot:
+            await self._slots.acquire()
+            self._holding_slot = True
+        return await run_in_threadpool(func, *args, **kwargs)
+
+    def add(self, instance):
+        self.sync_session.add(instance)
+
+    def add_all(self, instances):
+        self.sync_session.add_all(instances)
+
+    async def get(self, *args, **kwargs):
+        return await self._run(self.sync_session.get, *args, **kwargs)
+
+    async def execute(self, *args, **kwargs):
+        return await self._run(self.sync_session.execute, *args, **kwargs)
+
+    async def scalar(self, *args, **kwargs):
+        return await self._run(self.sync_session.scalar, *args, **kwargs)
+
+    async def scalars(self, *args, **kwargs):
+        return await self._run(self.sync_session.scalars, *args, **kwargs)
+
+    async def stream(self, *args, **kwargs):
+        result = await self._run(self.sync_session.execute, *args, **kwargs)
+        return SyncStreamResult(result)
+
+    async def delete(self, instance):
+        await self._run(self.sync_session.delete, instance)
+
+    async def flush(self):
+        await self._run(self.sync_session.flush)
+
+    async def refresh(self, instance):
+        await self._run(self.sync_session.refresh, instance)
+
+    async def commit(self):
+        await self._run(self.sync_session.commit)
+
+    async def rollback(self):
+        await self._run(self.sync_session.rollback)
+
+    async def begin_nested(self):
+        return SyncTransaction(self, await self._run(self.sync_session.begin_nested))
+
+    async def close(self):
+        try:
+            await run_in_threadpool(self.sync_session.close)
+        finally:
+            if self._holding_slot:
+                self._slots.release()
+                self._holding_slot = False
+
+
+def sync_engines():
+    """Every distinct sync Engine in use (the AsyncEngines' sync_engine in async mode), for event hooks."""
+    engines = [engine, read_engine]
+    if DATABASE_MODE == "async":
+        engines += [async_engine.sync_engine, async_read_engine.sync_engine]
+    return list({id(e): e for e in engines}.values())
+
+
+async def dispose_engines():
+    if DATABASE_MODE == "async":
+        await async_engine.dispose()
+        await async_read_engine.dispose()
+    engine.dispose()
+    read_engine.dispose()
+
+
+async def begin_write(session):
+    """Opens the SQLite write transaction now, before any SAVEPOINT.
+
+    pysqlite only emits BEGIN right before the first INSERT/UPDATE/DELETE, so a SAVEPOINT
+    issued earlier starts a transaction of its own and its RELEASE commits it. Call it
+    while the session has only read, never after a write.
+    """
+    await session.execute(text("BEGIN IMMEDIATE"))
+
+
+def open_session(read_only: bool = False):
+    if DATABASE_MODE == "async":
+        return AsyncReadSessionLocal() if read_only else AsyncSessionLocal()
+    if read_only:
+        return SyncSession(ReadSessionLocal(), read_session_slots)
+    return SyncSession(SessionLocal(), session_slots)
+
+
+async def get_session(request: HTTPConnection):
+    session = open_session(read_only=request.scope.get("method", "GET") in READ_METHODS)
     try:
         yield session
     finally:
-        session.close()
\ No newline at end of file
+        await session.close()
@@ -1,33 +1,64 @@
-import os 
-from dotenv import load_dotenv
-from passlib.context import CryptContext
 from wayne_api.models import User
-from sqlalchemy.orm import Session
-from fastapi import Depends, HTTPException, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
-from wayne_api.database import get_session
+import secrets
+from wayne_api.database import get_session, open_session
+from wayne_api.cache import user_cache
+from wayne_api.schemas import UserPublic
+from wayne_api.passwords import bcrypt_context
+from wayne_api.metrics import timed
+from wayne_api.settings import SECRET_KEY, ALGORITHM, ACCESS_TOKEN_EXPIRE_MINUTES, METRICS_TOKEN, METRICS_PUBLIC
 
 
-load_dotenv()
 
-SECRET_KEY = os.getenv("SECRET_KEY")
-ALGORITHM = os.getenv("ALGORITHM")
-ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", 30))
-
-
-
-bcrypt_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_schema = OAuth2PasswordBearer(tokenUrl="auth/login-form")
 
-def verify_token(token:str = Depends(oauth2_schema), session: Session = Depends(get_session)):
+async def get_user_from_token(token: str, session: AsyncSession):
     try:
         dic_info = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id = int(dic_info.get("sub"))    
+        user_id = int(dic_info.get("sub"))
     except JWTError:
         raise  HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Acesso negado")
-    
-    usuario = session.query(User).filter(User.id == user_id).first()
+
+    cached_user = user_cache.get(user_id)
+    if cached_user is not None:
+        return cached_user
+
+    usuario = await session.scalar(select(User).where(User.id == user_id))
     if not usuario:
         raise  HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Acesso negado")
-    return usuario
\ No newline at end of file
+    snapshot = UserPublic.model_validate(usuario)
+    user_cache.set(user_id, snapshot)
+    return snapshot
+
+
+async def verify_token(token:str = Depends(oauth2_schema), session: AsyncSession = Depends(get_session)):
+    with timed("auth"):
+        return await get_user_from_token(token, session)
+
+
+async def authenticate_token(token: str):
+    """verify_token for long-lived connections (/events), which must not hold a session open."""
+    session = open_session(read_only=True)
+    try:
+        with timed("auth"):
+            return await get_user_from_token(token, session)
+    finally:
+        await session.close()
+
+
+async def verify_metrics_access(request: Request):
+    """/metrics: the scraper's METRICS_TOKEN or an admin JWT, unless METRICS_PUBLIC."""
+    if METRICS_PUBLIC:
+        return
+    scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated", headers={"WWW-Authenticate": "Bearer"})
+    if METRICS_TOKEN and secrets.compare_digest(token.encode(), METRICS_TOKEN.encode()):
+        return
+    current_user = await authenticate_token(token)
+    if not current_user.admin:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Operation not permitted")
@@ -0,0 +1,115 @@
+import hashlib
+import mmap
+import os
+import secrets
+import struct
+from collections import defaultdict
+
+from fastapi import HTTPException, Request, Response, status
+
+from wayne_api.settings import SHARED_STATE_PATH
+
+
+COLLECTIONS = ("vehicles", "equipment", "equipment_safety")
+
+# arquivo compartilhado: epoch (8 bytes) + uma versão de 8 bytes por coleção
+_SLOT = struct.Struct("<q")
+_SHARED_SIZE = _SLOT.size * 16
+
+
+class CollectionVersions:
+    """Per-collection version counters, bumped after every committed mutation.
+
+    With ``shared_path`` (set by the multi-worker launcher) the versions live in an
+    mmap'd file, so a mutation in one worker invalidates the ETags served by all of
+    them. A bump then writes a fresh random value instead of incrementing, so racing
+    bumps from two workers can never leave the same version behind.
+    """
+
+    def __init__(self, shared_path: str = None):
+        self._versions = defaultdict(int)
+        self._shared = None
+        if shared_path:
+            fd = os.open(shared_path, os.O_RDWR | os.O_CREAT, 0o600)
+            try:
+                if os.fstat(fd).st_size < _SHARED_SIZE:
+                    # arquivo novo (criado pelo primeiro processo): epoch aleatório e versões zeradas
+                    os.write(fd, secrets.token_bytes(_SLOT.size) + bytes(_SHARED_SIZE - _SLOT.size))
+                self._shared = mmap.mmap(fd, _SHARED_SIZE)
+            finally:
+                os.close(fd)
+            self.epoch = self._shared[:_SLOT.size].hex()
+        else:
+            # muda a cada processo, para que ETags antigos não batam após um restart
+            self.epoch = secrets.token_hex(8)
+
+    @property
+    def shared(self):
+        return self._shared is not None
+
+    def _offset(self, collection: str):
+        return _SLOT.size * (1 + COLLECTIONS.index(collection))
+
+    def bump(self, collection: str):
+        if self._shared is not None:
+            _SLOT.pack_into(self._shared, self._offset(collection), secrets.randbits(63))
+        else:
+            self._versions[collection] += 1
+
+    def version(self, collection: str):
+        if self._shared is not None:
+            return _SLOT.unpack_from(self._shared, self._offset(collection))[0]
+        return self._versions[collection]
+
+    def etag(self, collection: str, *parts):
+        raw = ":".join(str(part) for part in (collection, self.epoch, self.version(collection), *parts))
+        return '"' + hashlib.sha256(raw.encode()).hexdigest()[:32] + '"'
+
+
+collection_versions = CollectionVersions(SHARED_STATE_PATH)
+
+
+# encodings que o CompressionMiddleware pode anexar ao ETag ("<tag>-gzip")
+CONTENT_ENCODINGS = ("gzip", "br", "zstd")
+
+
+def encoded_etag(etag: str, encoding: str) -> str:
+    """ETag of the ``encoding`` representation: the suffix goes inside the quotes."""
+    return f"{etag[:-1]}-{encoding}\"" if etag.endswith('"') else etag
+
+
+def _strip_encoding(etag: str) -> str:
+    for encoding in CONTENT_ENCODINGS:
+        if etag.endswith(f'-{encoding}"'):
+            return etag[: -len(encoding) - 2] + '"'
+    return etag
+
+
+def _etag_matches(if_none_match: str, etag: str):
+    """Returns the If-None-Match entry that matches ``etag`` (or None).
+
+    W/ and the encoding suffix don't change the version: any representation of the
+    current version counts, and the 304 echoes the one the client has.
+    """
+    if not if_none_match:
+        return None
+    for candidate in (candidate.strip() for candidate in if_none_match.split(",")):
+        if candidate == "*":
+            return etag
+        if _strip_encoding(candidate.removeprefix("W/")) == etag:
+            return candidate
+    return None
+
+
+def conditional_get(collection: str):
+    """Dependency that answers 304 from the collection version before any row is queried."""
+
+    async def check_etag(request: Request, response: Response):
+        etag = collection_versions.etag(collection, request.url.path, request.url.query)
+        matched = _etag_matches(request.headers.get("if-none-match"), etag)
+        if matched:
+            raise HTTPException(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": matched})
+        response.headers["ETag"] = etag
+        response.headers["Cache-Control"] = "private, no-cache"
+
+    return check_etag
@@ -0,0 +1,100 @@
+import asyncio
+import json
+
+from wayne_api.etag import COLLECTIONS, collection_versions
+from wayne_api.settings import EVENTS_QUEUE_SIZE
+
+
+class Subscription:
+    def __init__(self, collections, queue_size):
+        self.collections = collections
+        self.queue = asyncio.Queue(queue_size)
+
+
+class ChangeHub:
+    """In-process fan-out of committed mutations to the /events subscribers.
+
+    Each subscriber gets a bounded queue. ``publish`` never waits: a subscriber whose
+    queue is full is dropped (its queue is replaced by a single ``None`` sentinel) so
+    a slow client can never hold up the request that made the change.
+    """
+
+    def __init__(self, queue_size: int):
+        self.queue_size = queue_size
+        self._subscribers = set()
+        self.published = 0
+        self.dropped = 0
+        self._seen = {}
+
+    def subscribe(self, collections=None):
+        subscription = Subscription(frozenset(collections or COLLECTIONS), self.queue_size)
+        self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        self._subscribers.discard(subscription)
+
+    def _drop(self, subscription: Subscription):
+        self._subscribers.discard(subscription)
+        while not subscription.queue.empty():
+            subscription.queue.get_nowait()
+        subscription.queue.put_nowait(None)
+
+    def close(self):
+        """Ends every subscription, e.g. on graceful shutdown; clients reconnect and reload."""
+        for subscription in list(self._subscribers):
+            self._drop(subscription)
+
+    def publish(self, collection: str, op: str, id=None, data=None):
+        self._seen[collection] = collection_versions.version(collection)
+        if not self._subscribers:
+            return
+        # serializado uma vez só, compartilhado por todos os assinantes
+        message = json.dumps({
+            "collection": collection,
+            "op": op,
+            "id": id,
+            "version": collection_versions.version(collection),
+            "data": data,
+        }, default=str)
+        self.published += 1
+        for subscription in list(self._subscribers):
+            if collection not in subscription.collections:
+                continue
+            try:
+                subscription.queue.put_nowait(message)
+            except asyncio.QueueFull:
+                self._drop(subscription)
+                self.dropped += 1
+
+    async def watch_shared_versions(self, interval: float):
+        """Publishes a "changed" event (no id/data) for mutations made by other worker processes.
+
+        Only meaningful when collection_versions is shared; local mutations are already
+        published by the handlers and are skipped here.
+        """
+        self._seen = {collection: collection_versions.version(collection) for collection in COLLECTIONS}
+        while True:
+            await asyncio.sleep(interval)
+            for collection in COLLECTIONS:
+                if collection_versions.version(collection) != self._seen[collection]:
+                    self.publish(collection, "changed")
+
+    def stats(self):
+        return {
+            "subscribers": len(self._subscribers),
+            "published": self.published,
+            "dropped": self.dropped,
+        }
+
+
+change_hub = ChangeHub(EVENTS_QUEUE_SIZE)
+
+
+def batch_changes(result):
+    """Groups the ids of a batch result by status, so a batch is published as one event."""
+    changes = {"created": [], "updated": [], "deleted": []}
+    for item in result["results"]:
+        if item["status"] in changes:
+            changes[item["status"]].append(item["id"])
+    return changes
@@ -0,0 +1,49 @@
+import csv
+import io
+import json
+
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+
+from wayne_api.database import open_session
+from wayne_api.settings import EXPORT_CHUNK_SIZE
+
+
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+
+def _encode_csv(rows):
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    return buffer.getvalue()
+
+
+def _encode_ndjson(names, rows):
+    return "".join(json.dumps(dict(zip(names, row))) + "\n" for row in rows)
+
+
+async def _export_rows(columns, export_format: str):
+    names = [column.key for column in columns]
+    # sessão própria: o stream continua depois que o handler retorna
+    session = open_session(read_only=True)
+    try:
+        query = select(*columns).order_by(columns[0]).execution_options(yield_per=EXPORT_CHUNK_SIZE)
+        result = await session.stream(query)
+        if export_format == "csv":
+            yield _encode_csv([names])
+        async for rows in result.partitions():
+            if export_format == "csv":
+                yield _encode_csv(rows)
+            else:
+                yield _encode_ndjson(names, rows)
+    finally:
+        await session.close()
+
+
+def export_response(columns, export_format: str, filename: str):
+    """Streams every row of the given columns as NDJSON or CSV in constant memory."""
+    return StreamingResponse(
+        _export_rows(columns, export_format),
+        media_type=MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{export_format}"'},
+    )
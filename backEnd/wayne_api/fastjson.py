@@ -0,0 +1,49 @@
+from typing import Optional
+
+import orjson
+from fastapi import HTTPException, Query, Response, status
+
+
+def public_columns(model, schema):
+    """The model's columns in the Public schema's field order, so both paths emit the same keys in the same order."""
+    return [getattr(model, name) for name in schema.model_fields]
+
+
+def sparse_fields(model, schema):
+    """Dependency for ``?fields=name,status``: the requested columns in schema order (id always
+    included), or None when the client wants full rows."""
+    allowed = list(schema.model_fields)
+
+    def parse_fields(fields: Optional[str] = Query(None, description=f"Comma-separated subset of: {', '.join(allowed)} (id is always returned)")):
+        if fields is None:
+            return None
+        names = {name.strip() for name in fields.split(",") if name.strip()}
+        unknown = sorted(names.difference(allowed))
+        if unknown:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Unknown fields: {', '.join(unknown)}")
+        return [getattr(model, name) for name in allowed if name == "id" or name in names]
+
+    return parse_fields
+
+
+def _with_headers(fast_response: Response, response: Response):
+    # FastAPI não copia os headers das dependências (ETag, Cache-Control) quando o handler devolve um Response
+    fast_response.headers.raw.extend(response.headers.raw)
+    return fast_response
+
+
+def item_response(columns, row, response: Response):
+    names = [column.key for column in columns]
+    return _with_headers(Response(orjson.dumps(dict(zip(names, row))), media_type="application/json"), response)
+
+
+def list_response(key: str, columns, rows, next_cursor, response: Response, total=None):
+    """Serializes a list page straight from column tuples with orjson.
+
+    Skips ORM hydration and response_model validation; the body is byte-for-byte what
+    the response_model path renders for the same rows (compact separators, UTF-8).
+    """
+    names = [column.key for column in columns]
+    # zip para nos nomes: colunas extras no fim da linha (a de ordenação do paginate) ficam de fora
+    body = orjson.dumps({key: [dict(zip(names, row)) for row in rows], "next_cursor": next_cursor, "total": total})
+    return _with_headers(Response(body, media_type="application/json"), response)
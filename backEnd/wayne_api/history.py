@@ -0,0 +1,209 @@
+"""Status history of /equipment-safety.
+
+Every status change lands in equipment_safety_status_events (SQLite triggers, see the
+migration). ``compact`` folds finished days into equipment_safety_daily_status, the
+state of each item at 00:00 UTC plus its downtime during the day. Point-in-time and
+downtime queries start from the nearest snapshot and replay at most the events after
+it, so they stay bounded no matter how long the history gets.
+"""
+import argparse
+import asyncio
+import logging
+from datetime import date, datetime, time, timedelta, timezone
+
+from sqlalchemy import func, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from wayne_api.models import EquipmentSafetyDailyStatus, EquipmentSafetyStatusEvent
+
+
+logger = logging.getLogger("uvicorn.error")
+
+Event = EquipmentSafetyStatusEvent
+Daily = EquipmentSafetyDailyStatus
+
+
+def utc_naive(moment: datetime) -> datetime:
+    """The history is stored as naive UTC; aware datetimes are converted, naive ones taken as UTC."""
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return moment
+
+
+def day_start(day: date) -> datetime:
+    return datetime.combine(day, time.min)
+
+
+def is_down(status) -> bool:
+    # só False conta como parado; None é "desconhecido"
+    return status is False
+
+
+def _events(since=None, until=None, before=None, equipment_id=None):
+    query = select(Event.equipment_id, Event.status, Event.removed, Event.changed_at)
+    if since is not None:
+        query = query.where(Event.changed_at >= since)
+    if until is not None:
+        query = query.where(Event.changed_at <= until)
+    if before is not None:
+        query = query.where(Event.changed_at < before)
+    if equipment_id is not None:
+        query = query.where(Event.equipment_id == equipment_id)
+    return query.order_by(Event.changed_at, Event.id)
+
+
+def _apply(state: dict, event):
+    if event.removed:
+        state.pop(event.equipment_id, None)
+    else:
+        state[event.equipment_id] = event.status
+
+
+async def state_at(session, moment: datetime, equipment_id: int = None) -> dict:
+    """``{equipment_id: status}`` of the items that existed at ``moment`` (UTC)."""
+    if equipment_id is not None:
+        # um item só: último evento direto do índice (equipment_id, changed_at)
+        query = _events(until=moment, equipment_id=equipment_id).order_by(None).order_by(Event.changed_at.desc(), Event.id.desc())
+        event = (await session.execute(query.limit(1))).first()
+        return {} if event is None or event.removed else {equipment_id: event.status}
+
+    state = {}
+    since = None
+    snapshot_day = await session.scalar(select(func.max(Daily.day)).where(Daily.day <= moment.date()))
+    if snapshot_day is not None:
+        rows = await session.execute(select(Daily.equipment_id, Daily.status).where(Daily.day == snapshot_day, Daily.present))
+        state = {row.equipment_id: row.status for row in rows}
+        since = day_start(snapshot_day)
+    for event in await session.execute(_events(since=since, until=moment)):
+        _apply(state, event)
+    return state
+
+
+async def _replay(session, state: dict, start: datetime, end: datetime, equipment_id: int = None) -> dict:
+    """Replays the events of [start, end) over ``state`` (the state at ``start``, updated in place).
+
+    Returns the seconds each item spent non-operational in the window, for every item seen;
+    the part of the window after now is not counted.
+    """
+    totals = dict.fromkeys(state, 0.0)
+    down_since = {item_id: start for item_id, status in state.items() if is_down(status)}
+    for event in await session.execute(_events(since=start, before=end, equipment_id=equipment_id)):
+        totals.setdefault(event.equipment_id, 0.0)
+        went_down = not event.removed and is_down(event.status)
+        if event.equipment_id in down_since and not went_down:
+            totals[event.equipment_id] += (event.changed_at - down_since.pop(event.equipment_id)).total_seconds()
+        elif went_down and event.equipment_id not in down_since:
+            down_since[event.equipment_id] = event.changed_at
+        _apply(state, event)
+    # quem ainda está parado conta só até agora, mesmo que a janela termine no futuro
+    open_until = min(end, utc_naive(datetime.now(timezone.utc)))
+    for item_id, since in down_since.items():
+        totals[item_id] += max((open_until - since).total_seconds(), 0.0)
+    return totals
+
+
+async def _replay_downtime(session, start: datetime, end: datetime, equipment_id, totals: dict):
+    state = await state_at(session, start, equipment_id)
+    for item_id, seconds in (await _replay(session, state, start, end, equipment_id)).items():
+        totals[item_id] = totals.get(item_id, 0.0) + seconds
+
+
+async def downtime(session, start: datetime, end: datetime, equipment_id: int = None) -> dict:
+    """``{equipment_id: seconds non-operational}`` in [start, end), for every item that existed in the range.
+
+    Whole days already compacted come from the daily rows; only the edges are replayed.
+    """
+    totals = {}
+    first_day, last_day = (await session.execute(select(func.min(Daily.day), func.max(Daily.day)))).one()
+    full_from = start.date() if start == day_start(start.date()) else start.date() + timedelta(days=1)
+    full_to = end.date()  # exclusivo
+    if first_day is not None:
+        full_from = max(full_from, first_day)
+        full_to = min(full_to, last_day + timedelta(days=1))
+    if first_day is None or full_from >= full_to:
+        await _replay_downtime(session, start, end, equipment_id, totals)
+        return totals
+
+    query = (
+        select(Daily.equipment_id, func.sum(Daily.down_seconds))
+        .where(Daily.day >= full_from, Daily.day < full_to)
+        .group_by(Daily.equipment_id)
+    )
+    if equipment_id is not None:
+        query = query.where(Daily.equipment_id == equipment_id)
+    for item_id, seconds in await session.execute(query):
+        totals[item_id] = seconds
+    if start < day_start(full_from):
+        await _replay_downtime(session, start, day_start(full_from), equipment_id, totals)
+    if day_start(full_to) < end:
+        await _replay_downtime(session, day_start(full_to), end, equipment_id, totals)
+    return totals
+
+
+async def compact(session, until: date = None) -> int:
+    """Writes the daily rows of every finished day not compacted yet, one commit per day.
+
+    Safe to run concurrently (each worker may run it): rows already written are kept.
+    Returns the number of days written.
+    """
+    until = until or datetime.now(timezone.utc).date()
+    last_day = await session.scalar(select(func.max(Daily.day)))
+    if last_day is not None:
+        day = last_day + timedelta(days=1)
+    else:
+        first_event = await session.scalar(select(func.min(Event.changed_at)))
+        if first_event is None:
+            return 0
+        day = first_event.date()
+    if day >= until:
+        return 0
+
+    state = await state_at(session, day_start(day) - timedelta(microseconds=1))
+    written = 0
+    while day < until:
+        at_start = dict(state)
+        totals = await _replay(session, state, day_start(day), day_start(day + timedelta(days=1)))
+        rows = [
+            {"day": day, "equipment_id": item_id, "present": item_id in at_start, "status": at_start.get(item_id), "down_seconds": seconds}
+            for item_id, seconds in totals.items()
+        ]
+        if rows:
+            await session.execute(sqlite_insert(Daily).on_conflict_do_nothing(), rows)
+        await session.commit()
+        written += 1
+        day += timedelta(days=1)
+    return written
+
+
+async def compact_periodically(interval: float):
+    """Background task of the app: compacts finished days every ``interval`` seconds."""
+    from wayne_api.database import open_session
+
+    while True:
+        session = open_session()
+        try:
+            await compact(session)
+        except Exception:
+            logger.exception("Status history compaction failed, retrying in %.0fs", interval)
+        finally:
+            await session.close()
+        await asyncio.sleep(interval)
+
+
+async def _main(command: str):
+    from wayne_api.database import dispose_engines, open_session
+
+    session = open_session()
+    try:
+        days = await compact(session)
+    finally:
+        await session.close()
+        await dispose_engines()
+    print(f"compacted {days} day(s)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Manage the equipment-safety status history")
+    parser.add_argument("command", choices=["compact"])
+    args = parser.parse_args()
+    asyncio.run(_main(args.command))
@@ -0,0 +1,218 @@
+"""Bulk imports of CSV / NDJSON files.
+
+The upload is streamed to a temp file, never held in memory. A background task reads
+it back row by row, validates each row against the create schema and inserts the
+valid ones IMPORT_CHUNK_SIZE at a time, one transaction per chunk. Progress lives in
+import_jobs and is written in the same transaction as each chunk, so any worker can
+report it and it never runs ahead of what was committed.
+"""
+import asyncio
+import csv
+import itertools
+import json
+import logging
+import os
+import tempfile
+import uuid
+from collections import Counter
+from datetime import datetime, timezone
+
+from fastapi import HTTPException, Request, status
+from pydantic import ValidationError
+from sqlalchemy import insert, update
+from starlette.concurrency import run_in_threadpool
+
+from wayne_api.batch import validation_detail
+from wayne_api.database import open_session
+from wayne_api.etag import collection_versions
+from wayne_api.events import change_hub
+from wayne_api.models import ImportJob
+from wayne_api.summary import apply_counter_deltas, counter_deltas
+from wayne_api.settings import IMPORT_CHUNK_SIZE, IMPORT_MAX_BYTES, IMPORT_MAX_ERRORS, IMPORT_TEMP_DIR
+
+
+logger = logging.getLogger("uvicorn.error")
+
+# um import por vez por processo: todos disputam o mesmo writer
+_import_lock = asyncio.Lock()
+_tasks = set()
+
+
+def _utcnow():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def job_public(job) -> dict:
+    finished_at = job.finished_at or _utcnow()
+    elapsed = (finished_at - job.started_at).total_seconds() if job.started_at else 0
+    return {
+        "id": job.id,
+        "collection": job.collection,
+        "format": job.format,
+        "status": job.status,
+        "rows_processed": job.rows_processed,
+        "rows_inserted": job.rows_inserted,
+        "rows_failed": job.rows_failed,
+        "rows_per_second": round(job.rows_processed / elapsed, 1) if elapsed > 0 else 0.0,
+        "errors": json.loads(job.errors),
+        "detail": job.detail,
+        "created_at": job.created_at,
+        "started_at": job.started_at,
+        "finished_at": job.finished_at,
+    }
+
+
+async def _spool(request: Request, import_format: str) -> str:
+    """Writes the request body to a temp file as it arrives, up to IMPORT_MAX_BYTES."""
+    fd, path = tempfile.mkstemp(prefix="wayne-import-", suffix=f".{import_format}", dir=IMPORT_TEMP_DIR)
+    size = 0
+    try:
+        with os.fdopen(fd, "wb") as file:
+            async for chunk in request.stream():
+                size += len(chunk)
+                if size > IMPORT_MAX_BYTES:
+                    raise HTTPException(
+                        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                        detail=f"Import file exceeds the limit of {IMPORT_MAX_BYTES} bytes",
+                    )
+                file.write(chunk)
+    except BaseException:
+        os.unlink(path)
+        raise
+    if size == 0:
+        os.unlink(path)
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Empty import file")
+    return path
+
+
+def _read_rows(path: str, import_format: str):
+    """Yields (line number, row dict) from the file, or (line number, error message) for unreadable lines."""
+    with open(path, newline="", encoding="utf-8-sig") as file:
+        if import_format == "csv":
+            reader = csv.DictReader(file)
+            for row in reader:
+                # célula vazia conta como ausente: é assim que o /export escreve None
+                yield reader.line_num, {key: value for key, value in row.items() if key is not None and value != ""}
+            return
+        for number, line in enumerate(file, 1):
+            if not line.strip():
+                continue
+            try:
+                data = json.loads(line)
+            except ValueError as exc:
+                yield number, f"invalid JSON: {exc}"
+                continue
+            if not isinstance(data, dict):
+                yield number, "expected a JSON object"
+                continue
+            yield number, data
+
+
+def _next_chunk(rows, schema, size: int):
+    """Reads and validates up to ``size`` rows (runs in the threadpool)."""
+    processed = 0
+    values = []
+    errors = []
+    for number, data in itertools.islice(rows, size):
+        processed += 1
+        if isinstance(data, str):
+            errors.append({"row": number, "detail": data})
+            continue
+        try:
+            values.append(schema(**data).model_dump())
+        except ValidationError as exc:
+            errors.append({"row": number, "detail": validation_detail(exc)})
+    return processed, values, errors
+
+
+async def _update_job(job_id: str, **values):
+    session = open_session()
+    try:
+        await session.execute(update(ImportJob).where(ImportJob.id == job_id).values(**values))
+        await session.commit()
+    finally:
+        await session.close()
+
+
+async def _insert_chunk(job_id: str, model, values: list, progress: dict):
+    """Inserts one chunk, its summary counters and the job progress in a single transaction."""
+    deltas = Counter()
+    for row in values:
+        counter_deltas(model.__tablename__, after=row, deltas=deltas)
+    session = open_session()
+    try:
+        ids = []
+        if values:
+            ids = (await session.scalars(insert(model).returning(model.id, sort_by_parameter_order=True), values)).all()
+        await apply_counter_deltas(session, deltas)
+        await session.execute(update(ImportJob).where(ImportJob.id == job_id).values(**progress))
+        await session.commit()
+    finally:
+        await session.close()
+    return ids
+
+
+async def _run(job_id: str, path: str, import_format: str, model, schema, collection: str):
+    rows = _read_rows(path, import_format)
+    progress = {"rows_processed": 0, "rows_inserted": 0, "rows_failed": 0}
+    errors = []
+    try:
+        async with _import_lock:
+            await _update_job(job_id, status="running", started_at=_utcnow())
+            while True:
+                processed, values, row_errors = await run_in_threadpool(_next_chunk, rows, schema, IMPORT_CHUNK_SIZE)
+                if not processed:
+                    break
+                progress["rows_processed"] += processed
+                progress["rows_inserted"] += len(values)
+                progress["rows_failed"] += len(row_errors)
+                errors += row_errors[: IMPORT_MAX_ERRORS - len(errors)]
+                ids = await _insert_chunk(job_id, model, values, {**progress, "errors": json.dumps(errors)})
+                if ids:
+                    collection_versions.bump(collection)
+                    change_hub.publish(collection, "batch", data={"created": list(ids), "updated": [], "deleted": []})
+            await _update_job(job_id, status="done", finished_at=_utcnow())
+    except asyncio.CancelledError:
+        await _update_job(job_id, status="interrupted", detail="Server shut down during the import", finished_at=_utcnow())
+        raise
+    except Exception as exc:
+        logger.exception("Import %s into %s failed", job_id, collection)
+        await _update_job(job_id, status="failed", detail=str(exc), finished_at=_utcnow())
+    finally:
+        try:
+            rows.close()
+        except ValueError:
+            pass  # gerador ainda rodando no threadpool (cancelamento); o GC fecha o arquivo
+        os.unlink(path)
+
+
+async def start_import(request: Request, session, model, schema, collection: str, import_format: str, user_id: int) -> dict:
+    """Spools the request body to disk, records a queued job and starts it in the background."""
+    # o upload pode demorar: não segura a conexão (o writer, no perfil production) enquanto ele chega
+    await session.close()
+    path = await _spool(request, import_format)
+    job = ImportJob(
+        id=uuid.uuid4().hex, collection=collection, format=import_format, status="queued",
+        rows_processed=0, rows_inserted=0, rows_failed=0, errors="[]",
+        created_by=user_id, created_at=_utcnow(),
+    )
+    try:
+        session.add(job)
+        await session.commit()
+        await session.refresh(job)
+    except BaseException:
+        os.unlink(path)
+        raise
+    task = asyncio.create_task(_run(job.id, path, import_format, model, schema, collection))
+    _tasks.add(task)
+    task.add_done_callback(_tasks.discard)
+    return job_public(job)
+
+
+async def stop_imports(timeout: float = 5):
+    """Cancels the running imports; their jobs end as "interrupted" with the chunks already committed."""
+    tasks = list(_tasks)
+    for task in tasks:
+        task.cancel()
+    if tasks:
+        await asyncio.wait(tasks, timeout=timeout)
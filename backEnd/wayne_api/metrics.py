@@ -0,0 +1,260 @@
+import logging
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from sqlalchemy import event
+from starlette.datastructures import MutableHeaders
+
+from wayne_api.settings import SERVER_TIMING_ENABLED, SLOW_REQUEST_MS, SLOW_REQUEST_MAX_STATEMENTS
+
+
+logger = logging.getLogger("wayne_api.slow_requests")
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class RequestStats:
+    """What a single request spent on SQL and on the timed sections (auth, bcrypt)."""
+
+    __slots__ = ("sql_count", "sql_time", "statements", "timings")
+
+    def __init__(self):
+        self.sql_count = 0
+        self.sql_time = 0.0
+        self.statements = []
+        self.timings = defaultdict(float)
+
+
+_current_stats: ContextVar = ContextVar("wayne_request_stats", default=None)
+
+
+@contextmanager
+def timed(name: str):
+    """Adds the wall time of the block to the current request under ``name``."""
+    stats = _current_stats.get()
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        if stats is not None:
+            stats.timings[name] += time.perf_counter() - started
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._wayne_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current_stats.get()
+    started = getattr(context, "_wayne_started", None)
+    if stats is None or started is None:
+        return
+    elapsed = time.perf_counter() - started
+    stats.sql_count += 1
+    stats.sql_time += elapsed
+    if len(stats.statements) < SLOW_REQUEST_MAX_STATEMENTS:
+        stats.statements.append((statement, elapsed))
+
+
+def instrument_engines(engines):
+    # eventos de cursor só existem no engine síncrono (AsyncEngine.sync_engine no modo async)
+    for engine in engines:
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus sense."""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.count += 1
+        self.sum += value
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[index] += 1
+
+    def render_samples(self, name: str, labels: str = ""):
+        prefix = f"{labels}," if labels else ""
+        lines = [f'{name}_bucket{{{prefix}le="{bound}"}} {count}' for bound, count in zip(self.buckets, self.counts)]
+        lines.append(f'{name}_bucket{{{prefix}le="+Inf"}} {self.count}')
+        suffix = f"{{{labels}}}" if labels else ""
+        lines.append(f"{name}_sum{suffix} {self.sum:.6f}")
+        lines.append(f"{name}_count{suffix} {self.count}")
+        return lines
+
+
+class RouteMetrics:
+    def __init__(self):
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.sql_count = 0
+        self.sql_time = 0.0
+        self.timings = defaultdict(float)
+        self.statuses = Counter()
+
+
+def _labels(**labels):
+    return ",".join(f'{key}="{value}"' for key, value in labels.items())
+
+
+class MetricsRegistry:
+    """Per (method, route template) aggregates, rendered in the Prometheus text format."""
+
+    def __init__(self):
+        self._routes = defaultdict(RouteMetrics)
+        self.slow_requests = 0
+
+    def observe(self, method: str, route: str, status_code: int, duration: float, stats: RequestStats):
+        metrics = self._routes[(method, route)]
+        metrics.latency.observe(duration)
+        metrics.sql_count += stats.sql_count
+        metrics.sql_time += stats.sql_time
+        for name, value in stats.timings.items():
+            metrics.timings[name] += value
+        metrics.statuses[status_code] += 1
+
+    def render(self):
+        routes = sorted(self._routes.items())
+        lines = [
+            "# HELP wayne_http_requests_total Requests by route template and status code.",
+            "# TYPE wayne_http_requests_total counter",
+        ]
+        for (method, route), metrics in routes:
+            for status_code, count in sorted(metrics.statuses.items()):
+                lines.append(f"wayne_http_requests_total{{{_labels(method=method, route=route, status=status_code)}}} {count}")
+
+        lines += [
+            "# HELP wayne_http_request_duration_seconds Request latency by route template.",
+            "# TYPE wayne_http_request_duration_seconds histogram",
+        ]
+        for (method, route), metrics in routes:
+            lines += metrics.latency.render_samples("wayne_http_request_duration_seconds", _labels(method=method, route=route))
+
+        lines += [
+            "# HELP wayne_sql_queries_total SQL statements executed, by route template.",
+            "# TYPE wayne_sql_queries_total counter",
+        ]
+        lines += [
+            f"wayne_sql_queries_total{{{_labels(method=method, route=route)}}} {metrics.sql_count}"
+            for (method, route), metrics in routes
+        ]
+        lines += [
+            "# HELP wayne_sql_duration_seconds_total Time spent executing SQL, by route template.",
+            "# TYPE wayne_sql_duration_seconds_total counter",
+        ]
+        lines += [
+            f"wayne_sql_duration_seconds_total{{{_labels(method=method, route=route)}}} {metrics.sql_time:.6f}"
+            for (method, route), metrics in routes
+        ]
+        lines += [
+            "# HELP wayne_section_duration_seconds_total Time spent in timed sections (auth, bcrypt), by route template.",
+            "# TYPE wayne_section_duration_seconds_total counter",
+        ]
+        for (method, route), metrics in routes:
+            for name, value in sorted(metrics.timings.items()):
+                lines.append(f"wayne_section_duration_seconds_total{{{_labels(method=method, route=route, section=name)}}} {value:.6f}")
+
+        lines += [
+            "# HELP wayne_slow_requests_total Requests slower than SLOW_REQUEST_MS.",
+            "# TYPE wayne_slow_requests_total counter",
+            f"wayne_slow_requests_total {self.slow_requests}",
+        ]
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
+
+
+def render_gauge(name: str, help_text: str, value):
+    return f"# HELP {name} {help_text}\n# TYPE {name} gauge\n{name} {value}\n"
+
+
+def render_counter(name: str, help_text: str, value):
+    """Monotonic count since start; the sample gets the ``_total`` suffix, as in MetricsRegistry."""
+    name = f"{name}_total"
+    return f"# HELP {name} {help_text}\n# TYPE {name} counter\n{name} {value}\n"
+
+
+def render_histogram(name: str, help_text: str, histogram: Histogram):
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} histogram", *histogram.render_samples(name)]
+    return "\n".join(lines) + "\n"
+
+
+def server_timing(stats: RequestStats, duration: float):
+    parts = [f"app;dur={duration * 1000:.1f}", f'db;dur={stats.sql_time * 1000:.1f};desc="{stats.sql_count} queries"']
+    parts += [f"{name};dur={value * 1000:.1f}" for name, value in stats.timings.items()]
+    return ", ".join(parts)
+
+
+def route_template(scope):
+    route = scope.get("route")
+    # caminhos sem rota ficam agrupados para não explodir a cardinalidade das labels
+    return getattr(route, "path", "<unmatched>")
+
+
+def log_slow_request(method: str, route: str, status_code: int, duration: float, stats: RequestStats):
+    repeated = Counter(statement for statement, _ in stats.statements)
+    lines = [
+        f"slow request {method} {route} status={status_code} {duration * 1000:.1f}ms "
+        f"sql={stats.sql_count} ({stats.sql_time * 1000:.1f}ms)"
+    ]
+    for statement, count in repeated.most_common():
+        if count < 2:
+            break
+        # o mesmo SQL várias vezes na mesma requisição costuma ser N+1
+        lines.append(f"  repeated x{count}: {' '.join(statement.split())}")
+    lines += [f"  [{elapsed * 1000:.1f}ms] {' '.join(statement.split())}" for statement, elapsed in stats.statements]
+    if stats.sql_count > len(stats.statements):
+        lines.append(f"  ... {stats.sql_count - len(stats.statements)} more")
+    logger.warning("\n".join(lines))
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording latency, SQL and timed sections per route template.
+
+    Adds a Server-Timing header to the response and logs requests slower than SLOW_REQUEST_MS
+    together with the SQL they executed. Event streams are measured but never logged as slow.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _current_stats.set(stats)
+        started = time.perf_counter()
+        status_code = 500
+        streaming = False
+
+        async def send_with_timing(message):
+            nonlocal status_code, streaming
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = MutableHeaders(scope=message)
+                streaming = headers.get("content-type", "").startswith("text/event-stream")
+                if SERVER_TIMING_ENABLED:
+                    headers.append("Server-Timing", server_timing(stats, time.perf_counter() - started))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            duration = time.perf_counter() - started
+            _current_stats.reset(token)
+            method, route = scope["method"], route_template(scope)
+            metrics.observe(method, route, status_code, duration, stats)
+            if SLOW_REQUEST_MS and not streaming and duration * 1000 >= SLOW_REQUEST_MS:
+                metrics.slow_requests += 1
+                log_slow_request(method, route, status_code, duration, stats)
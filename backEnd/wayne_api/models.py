@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, Boolean
+from sqlalchemy import Column, Index, Integer, String, Text, Boolean, Date, DateTime, Float
 from .database import Base
 
 
@@ -20,13 +20,16 @@ class User(Base):
 
 class Vehicle(Base):
     __tablename__ = "vehicles"
+    __table_args__ = (
+        Index("ix_vehicles_type_year", "type", "year"), # filter by type (+ year range / sort by year)
+    )
 
 
 
     id = Column("id", Integer, primary_key=True, index=True, autoincrement=True)
     type = Column("type" , String) # terrestrial, aquatic, aerial
     model = Column("model" ,String, nullable=False)
-    year = Column("year", Integer, nullable=True)
+    year = Column("year", Integer, nullable=True, index=True)
 
     def __init__(self, type: str, model: str, year: int):
         self.type = type
@@ -38,7 +41,7 @@ class Equipment(Base):
     __tablename__ = "equipment"
 
     id = Column("id", Integer, primary_key=True, index=True, autoincrement=True)
-    name = Column("name", String, nullable=False)
+    name = Column("name", String, nullable=False, index=True)
     description = Column("description", String, nullable=True)
 
     def __init__(self, name: str, description: str):
@@ -50,11 +53,64 @@ class EquipmentSafety(Base):
     __tablename__ = "equipment_safety"
 
     id = Column("id", Integer, primary_key=True, index=True, autoincrement=True)
-    name = Column("name", String, nullable=False)
-    status = Column("status", Boolean) # True for operational, False for non-operational
+    name = Column("name", String, nullable=False, index=True)
+    status = Column("status", Boolean, index=True) # True for operational, False for non-operational
     description = Column("description", Text, nullable=True)
 
     def __init__(self, name: str, status: Boolean, description: str):
         self.name = name
         self.status = status
         self.description = description
+
+
+class SummaryCounter(Base):
+    __tablename__ = "summary_counters"
+
+    metric = Column("metric", String, primary_key=True) # total, vehicles_by_type, vehicles_by_year, equipment_safety_by_status
+    bucket = Column("bucket", String, primary_key=True)
+    value = Column("value", Integer, nullable=False, default=0)
+
+
+class EquipmentSafetyStatusEvent(Base):
+    """Append-only: one row per status change, written by SQLite triggers on equipment_safety."""
+    __tablename__ = "equipment_safety_status_events"
+    __table_args__ = (
+        Index("ix_equipment_safety_status_events_item_time", "equipment_id", "changed_at"), # history of one item
+        Index("ix_equipment_safety_status_events_changed_at", "changed_at"), # replay of a time window
+    )
+
+    id = Column("id", Integer, primary_key=True, autoincrement=True)
+    equipment_id = Column("equipment_id", Integer, nullable=False) # no FK: history outlives deleted items
+    status = Column("status", Boolean, nullable=True)
+    removed = Column("removed", Boolean, nullable=False, default=False) # True when the item was deleted
+    changed_at = Column("changed_at", DateTime, nullable=False) # UTC
+
+
+class EquipmentSafetyDailyStatus(Base):
+    """Compacted history: state of each item at 00:00 UTC and its downtime during that day."""
+    __tablename__ = "equipment_safety_daily_status"
+
+    day = Column("day", Date, primary_key=True)
+    equipment_id = Column("equipment_id", Integer, primary_key=True)
+    present = Column("present", Boolean, nullable=False) # existed at 00:00 (False: created during the day)
+    status = Column("status", Boolean, nullable=True) # status at 00:00
+    down_seconds = Column("down_seconds", Float, nullable=False, default=0)
+
+
+class ImportJob(Base):
+    """Bulk import job; progress is updated in the same transaction as each inserted chunk."""
+    __tablename__ = "import_jobs"
+
+    id = Column("id", String, primary_key=True)
+    collection = Column("collection", String, nullable=False) # vehicles, equipment, equipment_safety
+    format = Column("format", String, nullable=False) # csv, ndjson
+    status = Column("status", String, nullable=False) # queued, running, done, failed, interrupted
+    rows_processed = Column("rows_processed", Integer, nullable=False, default=0)
+    rows_inserted = Column("rows_inserted", Integer, nullable=False, default=0)
+    rows_failed = Column("rows_failed", Integer, nullable=False, default=0)
+    errors = Column("errors", Text, nullable=False, default="[]") # JSON: [{"row": n, "detail": "..."}], capped
+    detail = Column("detail", Text, nullable=True) # why the job failed
+    created_by = Column("created_by", Integer, nullable=True)
+    created_at = Column("created_at", DateTime, nullable=False) # UTC
+    started_at = Column("started_at", DateTime, nullable=True)
+    finished_at = Column("finished_at", DateTime, nullable=True)
@@ -0,0 +1,117 @@
+import base64
+import json
+
+from fastapi import HTTPException, status
+from sqlalchemy import and_, tuple_
+
+
+def encode_cursor(values: dict):
+    raw = json.dumps(values, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _invalid_cursor():
+    return HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+
+def _scalar_of(value, column) -> bool:
+    """True if ``value`` compares with ``column`` as a value of the same type (NULL included)."""
+    if value is None:
+        return True
+    expected = column.type.python_type
+    # bool é subclasse de int: {"v": true} não vale como ano
+    if isinstance(value, bool) != (expected is bool):
+        return False
+    return isinstance(value, (int, float) if expected is float else expected)
+
+
+def decode_cursor(token: str, sort: str = "id", sort_column=None):
+    """Decodes a cursor issued for ``sort``; anything else is a 400.
+
+    The cursor records its sort, so one from another ordering (or a forged ``v`` whose
+    type would compare by SQLite type class) can't silently land on the wrong page.
+    """
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except ValueError:
+        raise _invalid_cursor()
+    if not isinstance(values, dict) or type(values.get("id")) is not int or values.get("s") != sort:
+        raise _invalid_cursor()
+    if sort_column is not None and ("v" not in values or not _scalar_of(values["v"], sort_column)):
+        raise _invalid_cursor()
+    return values
+
+
+def _after_clauses(id_column, sort_column, descending: bool, cursor: dict):
+    """Conditions of the rows past the cursor, one per query, in page order.
+
+    Each one is a plain range on the (sort column, id) index; when the page may run
+    from the non-NULL values into the NULLs (or the other way round) the second
+    region is a separate query, since an OR of both keeps SQLite from seeking.
+    """
+    id_clause = id_column < cursor["id"] if descending else id_column > cursor["id"]
+    if sort_column is None:
+        return [id_clause]
+    value = cursor.get("v")
+    # SQLite ordena NULL primeiro em ASC e por último em DESC
+    if value is None:
+        if descending:
+            return [and_(sort_column.is_(None), id_clause)]
+        return [and_(sort_column.is_(None), id_clause), sort_column.is_not(None)]
+    # comparação por row value vira um range no índice (coluna, rowid)
+    if descending:
+        return [tuple_(sort_column, id_column) < tuple_(value, cursor["id"]), sort_column.is_(None)]
+    return [tuple_(sort_column, id_column) > tuple_(value, cursor["id"])]
+
+
+async def paginate(session, query, model, limit: int, offset: int = 0, after: str = None, sort: str = "id", columns=None, seek_filter_index: bool = False):
+    """Returns one page of rows plus the cursor for the next one.
+
+    ``sort`` is a column name, prefixed with ``-`` for descending order; ties are
+    broken by id. With ``after`` the page starts right past the cursor's (value, id)
+    (keyset), so its cost does not depend on how deep the page is; otherwise
+    ``offset`` is used as before. With ``columns`` only those are selected and the
+    rows are tuples instead of ORM objects (id and the sort column are appended when
+    missing, since the cursor needs them). ``seek_filter_index`` (id sorts only) hides
+    the primary key from the planner, so a selective range filter seeks its own index
+    and sorts the matches instead of walking every id until the page fills.
+    """
+    descending = sort.startswith("-")
+    sort_key = sort.lstrip("-")
+    id_column = model.id
+    sort_column = None if sort_key == "id" else getattr(model, sort_key)
+    # "+ 0": mesma ordem, mas o SQLite não usa mais o rowid para ordenar nem para o cursor
+    id_order = id_column + 0 if seek_filter_index and sort_column is None else id_column
+
+    order = [id_order.desc() if descending else id_order.asc()]
+    if sort_column is not None:
+        order.insert(0, sort_column.desc() if descending else sort_column.asc())
+    query = query.order_by(*order)
+    if columns is not None:
+        selected = {column.key for column in columns}
+        extra = [column for column in (id_column, sort_column) if column is not None and column.key not in selected]
+        query = query.with_only_columns(*columns, *extra)
+
+    async def fetch(page_query, size):
+        if columns is not None:
+            return (await session.execute(page_query.limit(size))).all()
+        return (await session.scalars(page_query.limit(size))).all()
+
+    if after is not None:
+        rows = []
+        for clause in _after_clauses(id_order, sort_column, descending, decode_cursor(after, sort, sort_column)):
+            rows += await fetch(query.where(clause), limit + 1 - len(rows))
+            if len(rows) > limit:
+                break
+    else:
+        rows = await fetch(query.offset(offset) if offset else query, limit + 1)
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        values = {"s": sort, "id": rows[-1].id}
+        if sort_column is not None:
+            values["v"] = getattr(rows[-1], sort_key)
+        next_cursor = encode_cursor(values)
+    return rows, next_cursor
@@ -0,0 +1,97 @@
+import math
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from fastapi import HTTPException, status
+
+from wayne_api.settings import (
+    LOGIN_IP_RATE_PER_MINUTE, LOGIN_IP_BURST, LOGIN_EMAIL_RATE_PER_MINUTE, LOGIN_EMAIL_BURST,
+    LOGIN_LIMITER_MAX_KEYS, LOGIN_MAX_IN_FLIGHT,
+)
+
+
+class TokenBucketLimiter:
+    """Token bucket per key; the least recently used keys are evicted past max_keys."""
+
+    def __init__(self, rate_per_minute: float, burst: int, max_keys: int):
+        self.rate = rate_per_minute / 60
+        self.burst = burst
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+
+    def acquire(self, key):
+        """Takes one token for ``key``; returns 0 if allowed, else the seconds until one is available."""
+        if self.rate <= 0:
+            return 0.0
+        now = time.monotonic()
+        tokens, updated_at = self._buckets.pop(key, (self.burst, now))
+        tokens = min(self.burst, tokens + (now - updated_at) * self.rate)
+        wait = 0.0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            wait = (1 - tokens) / self.rate
+        self._buckets[key] = (tokens, now)
+        # chave esquecida volta com o balde cheio; o teto mantém a memória fixa sob muitas chaves distintas
+        while len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        return wait
+
+    def __len__(self):
+        return len(self._buckets)
+
+
+def _too_many_requests(wait: float):
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail="Too many login attempts, try again later",
+        headers={"Retry-After": str(max(1, math.ceil(wait)))},
+    )
+
+
+class LoginLimiter:
+    """Sheds login attempts with 429 before any DB or bcrypt work.
+
+    Every attempt takes a token from its client IP's bucket and from its email's bucket,
+    and at most ``max_in_flight`` logins are verified at once.
+    """
+
+    def __init__(self, ip_limiter: TokenBucketLimiter, email_limiter: TokenBucketLimiter, max_in_flight: int):
+        self.ip_limiter = ip_limiter
+        self.email_limiter = email_limiter
+        self.max_in_flight = max_in_flight
+        self.in_flight = 0
+        self.rejected = 0
+
+    def check(self, client_ip: str, email: str):
+        wait = max(self.ip_limiter.acquire(client_ip), self.email_limiter.acquire(email.strip().lower()))
+        if wait:
+            self.rejected += 1
+            raise _too_many_requests(wait)
+
+    @contextmanager
+    def slot(self):
+        if self.max_in_flight and self.in_flight >= self.max_in_flight:
+            self.rejected += 1
+            raise _too_many_requests(1)
+        self.in_flight += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+
+    def stats(self):
+        return {
+            "in_flight": self.in_flight,
+            "rejected": self.rejected,
+            "ip_keys": len(self.ip_limiter),
+            "email_keys": len(self.email_limiter),
+        }
+
+
+login_limiter = LoginLimiter(
+    TokenBucketLimiter(LOGIN_IP_RATE_PER_MINUTE, LOGIN_IP_BURST, LOGIN_LIMITER_MAX_KEYS),
+    TokenBucketLimiter(LOGIN_EMAIL_RATE_PER_MINUTE, LOGIN_EMAIL_BURST, LOGIN_LIMITER_MAX_KEYS),
+    LOGIN_MAX_IN_FLIGHT,
+)
@@ -1,13 +1,17 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from jose import JWTError, jwt
 from datetime import datetime, timedelta, timezone
 
 from wayne_api.models import User
 from wayne_api.database import get_session
-from wayne_api.schemas import UserBase, UserLogin, Message
-from wayne_api.dependencies import bcrypt_context, SECRET_KEY, ALGORITHM, ACCESS_TOKEN_EXPIRE_MINUTES, verify_token
+from wayne_api.schemas import UserBase, UserPublic, UserLogin, Message
+from wayne_api.cache import user_cache
+from wayne_api.passwords import password_pool
+from wayne_api.ratelimit import login_limiter
+from wayne_api.dependencies import SECRET_KEY, ALGORITHM, ACCESS_TOKEN_EXPIRE_MINUTES, verify_token
 
 router = APIRouter(
     prefix="/auth",
@@ -21,36 +25,50 @@ def criar_token(id, duracao_token=timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
 
 
 
-def autenticar_usuario(email: str, password: str, session: Session):
-    user = session.query(User).filter(User.email == email).first()
+def client_ip(request: Request):
+    # atrás de proxy, rode o uvicorn com --proxy-headers para request.client refletir o X-Forwarded-For
+    return request.client.host if request.client else "unknown"
+
+
+async def autenticar_usuario(email: str, password: str, session: AsyncSession):
+    user = await session.scalar(select(User).where(User.email == email))
     if not user: 
         return False
-    elif not bcrypt_context.verify(password, user.password):
+    valid, new_hash = await password_pool.verify_and_update(password, user.password)
+    if not valid:
         return False
+    if new_hash:
+        # custo do bcrypt mudou: regrava o hash com o custo atual
+        user.password = new_hash
+        await session.commit()
+        user_cache.invalidate(user.id)
     return user
 
 
 
 @router.post("/register", response_model=Message, status_code=status.HTTP_201_CREATED)
-def register_user(user: UserBase, session: Session = Depends(get_session)):
-    existing_user = session.query(User).filter(User.email == user.email).first()
+async def register_user(user: UserBase, session: AsyncSession = Depends(get_session)):
+    existing_user = await session.scalar(select(User).where(User.email == user.email))
     if existing_user:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Email already registered")
     
-    hashed_password = bcrypt_context.hash(user.password)
+    hashed_password = await password_pool.hash(user.password)
     user_dict = user.model_dump()
     user_dict["password"] = hashed_password
     new_user = User(**user_dict)
     
     session.add(new_user)
-    session.commit()
-    session.refresh(new_user)
+    await session.commit()
+    await session.refresh(new_user)
+    user_cache.invalidate(new_user.id)
     
     return {"mensagem": "usuario criado com sucesso"}
 
 @router.post("/login")
-def login_user(user: UserLogin, session: Session = Depends(get_session)):
-    authenticated_user = autenticar_usuario(user.email, user.password, session)
+async def login_user(user: UserLogin, request: Request, session: AsyncSession = Depends(get_session)):
+    login_limiter.check(client_ip(request), user.email)
+    with login_limiter.slot():
+        authenticated_user = await autenticar_usuario(user.email, user.password, session)
     if not authenticated_user:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid email or password")
     
@@ -64,8 +82,10 @@ def login_user(user: UserLogin, session: Session = Depends(get_session)):
             }
     
 @router.post("/login-form")
-def login_form(form_data: OAuth2PasswordRequestForm = Depends(), session: Session = Depends(get_session)):
-    authenticated_user = autenticar_usuario(form_data.username, form_data.password, session)
+async def login_form(request: Request, form_data: OAuth2PasswordRequestForm = Depends(), session: AsyncSession = Depends(get_session)):
+    login_limiter.check(client_ip(request), form_data.username)
+    with login_limiter.slot():
+        authenticated_user = await autenticar_usuario(form_data.username, form_data.password, session)
     if not authenticated_user:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid email or password")
     
@@ -78,7 +98,7 @@ def login_form(form_data: OAuth2PasswordRequestForm = Depends(), session: Sessio
 
 
 @router.post("/refresh")
-def refresh_token(current_user: User = Depends(verify_token)):
+async def refresh_token(current_user: UserPublic = Depends(verify_token)):
     new_access_token = criar_token(str(current_user.id))
     return {
         "access_token": new_access_token,
@@ -86,6 +106,13 @@ def refresh_token(current_user: User = Depends(verify_token)):
     }
 
 
-@router.get("/me", response_model=UserBase)
-def read_current_user(current_user: User = Depends(verify_token)):
-    return current_user
\ No newline at end of file
+@router.get("/me", response_model=UserPublic)
+async def read_current_user(current_user: UserPublic = Depends(verify_token)):
+    return current_user
+
+
+@router.get("/cache-stats")
+async def user_cache_stats(current_user: UserPublic = Depends(verify_token)):
+    if not current_user.admin:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Operation not permitted")
+    return user_cache.stats()
\ No newline at end of file
@@ -1,11 +1,23 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
 from sqlalchemy import select
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from wayne_api.database import get_session
-from wayne_api.models import Equipment, User
-from wayne_api.schemas import EquipmentBase, EquipmentPublic, EquipmentPartialUpdate, EquipmentList
+from wayne_api.models import Equipment
+from wayne_api.schemas import EquipmentBase, EquipmentPublic, EquipmentPartialUpdate, EquipmentList, UserPublic, BatchOperation, BatchResult, ImportJobPublic
 from wayne_api.dependencies import verify_token
+from wayne_api.pagination import paginate
+from wayne_api.batch import apply_batch
+from wayne_api.export import export_response
+from wayne_api.imports import start_import
+from wayne_api.etag import collection_versions, conditional_get
+from wayne_api.summary import counter_snapshot, track_change
+from wayne_api.events import batch_changes, change_hub
+from wayne_api.counts import list_total
+from wayne_api.fastjson import item_response, list_response, public_columns, sparse_fields
+from wayne_api.settings import FAST_JSON
 
 router = APIRouter(
     prefix="/equipment",
@@ -13,68 +25,130 @@ router = APIRouter(
     dependencies=[Depends(verify_token)],
 )
 
+EQUIPMENT_COLUMNS = public_columns(Equipment, EquipmentPublic)
+
 
 @router.post("/", response_model=EquipmentPublic, status_code=status.HTTP_201_CREATED)
-def create_equipment(equipment: EquipmentBase, session: Session = Depends(get_session), current_user: User = Depends(verify_token)):
+async def create_equipment(equipment: EquipmentBase, session: AsyncSession = Depends(get_session), current_user: UserPublic = Depends(verify_token)):
     if not current_user.admin:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Operation not permitted")
     equipment = Equipment(**equipment.model_dump())
     session.add(equipment)
-    session.commit()
-    session.refresh(equipment)
+    await track_change(session, Equipment, after=equipment)
+    await session.commit()
+    collection_versions.bump("equipment")
+    await session.refresh(equipment)
+    change_hub.publish("equipment", "created", equipment.id, EquipmentPublic.model_validate(equipment).model_dump())
     return equipment
 
 
-@router.get("/", response_model=EquipmentList)
-def list_equipment(offset: int = 0, limit: int = 10, session: Session = Depends(get_session)):
-    query = session.scalars(select(Equipment).offset(offset).limit(limit))
-    equipments = query.all()
-    return {"equipment": equipments}
+@router.get("/", response_model=EquipmentList, dependencies=[Depends(conditional_get("equipment"))])
+async def list_equipment(
+    response: Response,
+    offset: int = 0,
+    limit: int = Query(10, ge=1),
+    after: Optional[str] = None,
+    name: Optional[str] = None,
+    sort: Literal["id", "-id", "name", "-name"] = "id",
+    fields = Depends(sparse_fields(Equipment, EquipmentPublic)),
+    count: Literal["estimate", "exact", "none"] = "estimate",
+    session: AsyncSession = Depends(get_session),
+):
+    query = select(Equipment)
+    if name is not None:
+        query = query.where(Equipment.name == name)
+    total = await list_total(session, "equipment", Equipment, query, {"name": name}, count, response)
+    if fields is not None or FAST_JSON:
+        columns = fields or EQUIPMENT_COLUMNS
+        rows, next_cursor = await paginate(session, query, Equipment, limit, offset, after, sort, columns=columns)
+        return list_response("equipment", columns, rows, next_cursor, response, total)
+    equipments, next_cursor = await paginate(session, query, Equipment, limit, offset, after, sort)
+    return {"equipment": equipments, "next_cursor": next_cursor, "total": total}
+
 
+@router.get("/export")
+async def export_equipment(format: Literal["ndjson", "csv"] = "ndjson", fields = Depends(sparse_fields(Equipment, EquipmentPublic))):
+    return export_response(fields or EQUIPMENT_COLUMNS, format, "equipment")
 
-@router.get("/{equipment_id}", response_model=EquipmentPublic)
-def get_equipment(equipment_id: int, session: Session = Depends(get_session)):
-    equipment = session.get(Equipment, equipment_id)
+
+@router.get("/{equipment_id}", response_model=EquipmentPublic, dependencies=[Depends(conditional_get("equipment"))])
+async def get_equipment(equipment_id: int, response: Response, fields = Depends(sparse_fields(Equipment, EquipmentPublic)), session: AsyncSession = Depends(get_session)):
+    if fields is not None:
+        row = (await session.execute(select(*fields).where(Equipment.id == equipment_id))).first()
+        if row is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Equipment not found")
+        return item_response(fields, row, response)
+    equipment = await session.get(Equipment, equipment_id)
     if not equipment:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Equipment not found")
     return equipment
 
 
 @router.put("/{equipment_id}", response_model=EquipmentPublic)
-def update_equipment(equipment_id: int, updated_equipment: EquipmentBase, session: Session = Depends(get_session), current_user: User = Depends(verify_token)):
-    equipment = session.get(Equipment, equipment_id)
+async def update_equipment(equipment_id: int, updated_equipment: EquipmentBase, session: AsyncSession = Depends(get_session), current_user: UserPublic = Depends(verify_token)):
+    equipment = await session.get(Equipment, equipment_id)
     if not equipment:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Equipment not found")
     if not current_user.admin:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Operation not permitted")
+    before = counter_snapshot(Equipment, equipment)
     for key, value in updated_equipment.model_dump().items():
         setattr(equipment, key, value)
-    session.commit()
-    session.refresh(equipment)
+    await track_change(session, Equipment, before=before, after=equipment)
+    await session.commit()
+    collection_versions.bump("equipment")
+    await session.refresh(equipment)
+    change_hub.publish("equipment", "updated", equipment.id, EquipmentPublic.model_validate(equipment).model_dump())
     return equipment
 
 
 @router.patch("/{equipment_id}", response_model=EquipmentPublic)
-def partial_update_equipment(equipment_id: int, equipment_update: EquipmentPartialUpdate, session: Session = Depends(get_session), current_user: User = Depends(verify_token)):
-    equipment = session.get(Equipment, equipment_id)
+async def partial_update_equipment(equipment_id: int, equipment_update: EquipmentPartialUpdate, session: AsyncSession = Depends(get_session), current_user: UserPublic = Depends(verify_token)):
+    equipment = await session.get(Equipment, equipment_id)
     if not equipment:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Equipment not found")
     if not current_user.admin:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Operation not permitted")
     update_data = equipment_update.model_dump(exclude_unset=True)
+    before = counter_snapshot(Equipment, equipment)
     for key, value in update_data.items():
         setattr(equipment, key, value)
-    session.commit()
-    session.refresh(equipment)
+    await track_change(session, Equipment, before=before, after=equipment)
+    await session.commit()
+    collection_versions.bump("equipment")
+    await session.refresh(equipment)
+    change_hub.publish("equipment", "updated", equipment.id, EquipmentPublic.model_validate(equipment).model_dump())
     return equipment
 
 
 @router.delete("/{equipment_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_equipment(equipment_id: int, session: Session = Depends(get_session), current_user: User = Depends(verify_token)):
-    equipment = session.get(Equipment, equipment_id)
+async def delete_equipment(equipment_id: int, session: AsyncSession = Depends(get_session), current_user: UserPublic = Depends(verify_token)):
+    equipment = await session.get(Equipment, equipment_id)
     if not equipment:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Equipment not found")
     if not current_user.admin:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Operation not permitted")
-    session.delete(equipment)
-    session.commit()
+    await session.delete(equipment)
+    await track_change(session, Equipment, before=equipment)
+    await session.commit()
+    collection_versions.bump("equipment")
+    change_hub.publish("equipment", "deleted", equipment_id)
+
+
+@router.post("/batch", response_model=BatchResult)
+async def batch_equipment(operations: list[BatchOperation], session: AsyncSession = Depends(get_session), current_user: UserPublic = Depends(verify_token)):
+    if not current_user.admin:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Operation not permitted")
+    result = await apply_batch(session, Equipment, operations, EquipmentBase, EquipmentPartialUpdate)
+    collection_versions.bump("equipment")
+    change_hub.publish("equipment", "batch", data=batch_changes(result))
+    return result
+
+
+@router.post("/import", response_model=ImportJobPublic, status_code=status.HTTP_202_ACCEPTED)
+async def import_equipment(request: Request, response: Response, format: Literal["ndjson", "csv"] = "ndjson", session: AsyncSession = Depends(get_session), current_user=Depends(verify_token)):
+    if not current_user.admin:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Operation not permitted")
+    job = await start_import(request, session, Equipment, EquipmentBase, "equipment", format, current_user.id)
+    response.headers["Location"] = f"/imports/{job['id']}"
+    return job
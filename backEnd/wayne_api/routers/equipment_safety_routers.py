@@ -1,76 +1,220 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from datetime import datetime, timezone
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from pydantic import ValidationError
 from sqlalchemy import select
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from wayne_api.database import get_session
 from wayne_api.models import EquipmentSafety
-from wayne_api.schemas import EquipmentSafetyBase, EquipmentSafetyPublic, EquipmentSafetyPartialUpdate, EquipmentSafetyList
+from wayne_api.schemas import EquipmentSafetyBase, EquipmentSafetyPublic, EquipmentSafetyPartialUpdate, EquipmentSafetyList, BatchOperation, BatchResult, ImportJobPublic, EquipmentSafetyStatusAt, EquipmentSafetyDowntime
 from wayne_api.dependencies import verify_token
+from wayne_api.pagination import paginate
+from wayne_api.batch import apply_batch, validation_detail
+from wayne_api.export import export_response
+from wayne_api.imports import start_import
+from wayne_api.etag import collection_versions, conditional_get
+from wayne_api.summary import counter_snapshot, track_change
+from wayne_api.events import batch_changes, change_hub
+from wayne_api.counts import list_total
+from wayne_api.fastjson import item_response, list_response, public_columns, sparse_fields
+from wayne_api.writebehind import equipment_safety_writes
+from wayne_api.history import downtime, state_at, utc_naive
+from wayne_api.settings import FAST_JSON, WRITE_BEHIND_ENABLED
 router = APIRouter(
     prefix="/equipment-safety",
     tags =["Equipment Safety"],
     dependencies=[Depends(verify_token)]
 )
 
+EQUIPMENT_SAFETY_COLUMNS = public_columns(EquipmentSafety, EquipmentSafetyPublic)
+
 @router.post("/", response_model=EquipmentSafetyPublic, status_code=status.HTTP_201_CREATED)
-def create_equipment_safety(equipment_safety: EquipmentSafetyBase, session: Session = Depends(get_session), current_user = Depends(verify_token)):
+async def create_equipment_safety(equipment_safety: EquipmentSafetyBase, session: AsyncSession = Depends(get_session), current_user = Depends(verify_token)):
     if not current_user.admin:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Operation not permitted")
     equipment_safety = EquipmentSafety(**equipment_safety.model_dump())
     session.add(equipment_safety)
-    session.commit()
-    session.refresh(equipment_safety)
+    await track_change(session, EquipmentSafety, after=equipment_safety)
+    await session.commit()
+    collection_versions.bump("equipment_safety")
+    await session.refresh(equipment_safety)
+    change_hub.publish("equipment_safety", "created", equipment_safety.id, EquipmentSafetyPublic.model_validate(equipment_safety).model_dump())
     return equipment_safety
 
 
-@router.get("/", response_model=EquipmentSafetyList)
-def list_equipment_safety(offset: int = 0, limit: int = 10, session: Session = Depends(get_session)):
-    query = session.scalars(select(EquipmentSafety).offset(offset).limit(limit))
-    all_equipment = query.all()
-    return {"equipmentSafety": all_equipment}
+@router.get("/", response_model=EquipmentSafetyList, dependencies=[Depends(conditional_get("equipment_safety"))])
+async def list_equipment_safety(
+    response: Response,
+    offset: int = 0,
+    limit: int = Query(10, ge=1),
+    after: Optional[str] = None,
+    status_filter: Optional[bool] = Query(None, alias="status"),
+    name: Optional[str] = None,
+    sort: Literal["id", "-id", "name", "-name"] = "id",
+    fields = Depends(sparse_fields(EquipmentSafety, EquipmentSafetyPublic)),
+    count: Literal["estimate", "exact", "none"] = "estimate",
+    session: AsyncSession = Depends(get_session),
+):
+    query = select(EquipmentSafety)
+    if status_filter is not None:
+        query = query.where(EquipmentSafety.status == status_filter)
+    if name is not None:
+        query = query.where(EquipmentSafety.name == name)
+    total = await list_total(session, "equipment_safety", EquipmentSafety, query, {"status": status_filter, "name": name}, count, response)
+    if fields is not None or FAST_JSON:
+        columns = fields or EQUIPMENT_SAFETY_COLUMNS
+        rows, next_cursor = await paginate(session, query, EquipmentSafety, limit, offset, after, sort, columns=columns)
+        return list_response("equipmentSafety", columns, rows, next_cursor, response, total)
+    all_equipment, next_cursor = await paginate(session, query, EquipmentSafety, limit, offset, after, sort)
+    return {"equipmentSafety": all_equipment, "next_cursor": next_cursor, "total": total}
+
+
+@router.get("/export")
+async def export_equipment_safety(format: Literal["ndjson", "csv"] = "ndjson", fields = Depends(sparse_fields(EquipmentSafety, EquipmentSafetyPublic))):
+    return export_response(fields or EQUIPMENT_SAFETY_COLUMNS, format, "equipment_safety")
+
+
+@router.get("/history/status-at", response_model=EquipmentSafetyStatusAt, dependencies=[Depends(conditional_get("equipment_safety"))])
+async def equipment_safety_status_at(at: datetime, equipment_id: Optional[int] = None, session: AsyncSession = Depends(get_session)):
+    at = utc_naive(at)
+    state = await state_at(session, at, equipment_id)
+    return {"at": at, "items": [{"id": item_id, "status": item_status} for item_id, item_status in sorted(state.items())]}
 
 
-@router.get("/{equipment_safety_id}", response_model=EquipmentSafetyPublic)
-def get_equipment_safety(equipment_safety_id: int, session: Session = Depends(get_session)):
-    equipment_safety = session.get(EquipmentSafety, equipment_safety_id)
+@router.get("/history/downtime", response_model=EquipmentSafetyDowntime)
+async def equipment_safety_downtime(request: Request, response: Response, start: datetime, end: datetime, equipment_id: Optional[int] = None, session: AsyncSession = Depends(get_session)):
+    start, end = utc_naive(start), utc_naive(end)
+    if end <= start:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="end must be after start")
+    # janela que ainda não terminou muda com o tempo, sem escrita nenhuma: não dá para versionar por ETag
+    if end <= utc_naive(datetime.now(timezone.utc)):
+        await conditional_get("equipment_safety")(request, response)
+    totals = await downtime(session, start, end, equipment_id)
+    return {"start": start, "end": end, "items": [{"id": item_id, "down_seconds": round(seconds, 3)} for item_id, seconds in sorted(totals.items())]}
+
+
+@router.get("/{equipment_safety_id}", response_model=EquipmentSafetyPublic, dependencies=[Depends(conditional_get("equipment_safety"))])
+async def get_equipment_safety(equipment_safety_id: int, response: Response, fields = Depends(sparse_fields(EquipmentSafety, EquipmentSafetyPublic)), session: AsyncSession = Depends(get_session)):
+    if fields is not None:
+        row = (await session.execute(select(*fields).where(EquipmentSafety.id == equipment_safety_id))).first()
+        if row is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Equipment Safety not found")
+        return item_response(fields, row, response)
+    equipment_safety = await session.get(EquipmentSafety, equipment_safety_id)
     if not equipment_safety:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Equipment Safety not found")
     return equipment_safety
 
 @router.put("/{equipment_safety_id}", response_model=EquipmentSafetyPublic)
-def update_equipment_safety(equipment_safety_id: int, updated_equipment_safety: EquipmentSafetyBase, session: Session = Depends(get_session), current_user = Depends(verify_token)):
-    equipment_safety = session.get(EquipmentSafety, equipment_safety_id)
+async def update_equipment_safety(equipment_safety_id: int, updated_equipment_safety: EquipmentSafetyBase, session: AsyncSession = Depends(get_session), current_user = Depends(verify_token)):
+    equipment_safety = await session.get(EquipmentSafety, equipment_safety_id)
     if not equipment_safety:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Equipment Safety not found")
     if not current_user.admin:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Operation not permitted")
+    before = counter_snapshot(EquipmentSafety, equipment_safety)
     for key, value in updated_equipment_safety.model_dump().items():
         setattr(equipment_safety, key, value)
-    session.commit()
-    session.refresh(equipment_safety)
+    await track_change(session, EquipmentSafety, before=before, after=equipment_safety)
+    await session.commit()
+    collection_versions.bump("equipment_safety")
+    await session.refresh(equipment_safety)
+    change_hub.publish("equipment_safety", "updated", equipment_safety.id, EquipmentSafetyPublic.model_validate(equipment_safety).model_dump())
     return equipment_safety
 
 
-@router.patch("/{equipment_safety_id}", response_model=EquipmentSafetyPublic)
-def partial_update_equipment_safety(equipment_safety_id: int, equipment_safety_update: EquipmentSafetyPartialUpdate, session: Session = Depends(get_session), current_user = Depends(verify_token)):
-    equipment_safety = session.get(EquipmentSafety, equipment_safety_id)
+@router.patch(
+    "/{equipment_safety_id}",
+    response_model=EquipmentSafetyPublic,
+    responses={202: {"description": "Queued in memory only (write-behind with wait=queued); lost if the process dies before the flush"}},
+)
+async def partial_update_equipment_safety(
+    equipment_safety_id: int,
+    equipment_safety_update: EquipmentSafetyPartialUpdate,
+    response: Response,
+    wait: Literal["queued", "flushed"] = "flushed",
+    session: AsyncSession = Depends(get_session),
+    current_user = Depends(verify_token),
+):
+    """With WRITE_BEHIND_ENABLED the update goes through the write-behind queue.
+
+    ``wait=flushed`` (default) answers 200 once the batch holding it has committed.
+    ``wait=queued`` answers 202 with the predicted row right after the in-memory
+    enqueue: that write is not durable and is lost if the process crashes or the
+    flush keeps failing (dropped writes are logged with their fields).
+    """
+    if WRITE_BEHIND_ENABLED:
+        return await queue_partial_update(equipment_safety_id, equipment_safety_update, wait, response, session, current_user)
+    equipment_safety = await session.get(EquipmentSafety, equipment_safety_id)
     if not equipment_safety:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Equipment Safety not found")
     if not current_user.admin:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Operation not permitted")
     update_data = equipment_safety_update.model_dump(exclude_unset=True)
+    before = counter_snapshot(EquipmentSafety, equipment_safety)
     for key, value in update_data.items():
         setattr(equipment_safety, key, value)
-    session.commit()
-    session.refresh(equipment_safety)
+    await track_change(session, EquipmentSafety, before=before, after=equipment_safety)
+    await session.commit()
+    collection_versions.bump("equipment_safety")
+    await session.refresh(equipment_safety)
+    change_hub.publish("equipment_safety", "updated", equipment_safety.id, EquipmentSafetyPublic.model_validate(equipment_safety).model_dump())
     return equipment_safety
 
+async def queue_partial_update(equipment_safety_id: int, equipment_safety_update: EquipmentSafetyPartialUpdate, wait: str, response: Response, session, current_user):
+    # wait=queued responde 202 com o estado previsto; wait=flushed espera o commit do lote
+    current = await equipment_safety_writes.current(session, equipment_safety_id)
+    if current is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Equipment Safety not found")
+    if not current_user.admin:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Operation not permitted")
+    # devolve a conexão antes de esperar: no perfil production o flush usa a mesma conexão escritora
+    await session.close()
+    update_data = equipment_safety_update.model_dump(exclude_unset=True)
+    # valida a linha como vai ficar: um update inválido na fila derrubaria o lote inteiro no flush
+    try:
+        EquipmentSafetyPublic.model_validate({**current, **update_data})
+    except ValidationError as exc:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_CONTENT, detail=validation_detail(exc))
+    flushed = equipment_safety_writes.submit(equipment_safety_id, update_data, wait=wait == "flushed")
+    if wait == "queued":
+        response.status_code = status.HTTP_202_ACCEPTED
+        return {**current, **update_data}
+    result = await flushed
+    if result is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Equipment Safety not found")
+    return result
+
 @router.delete("/{equipment_safety_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_equipment_safety(equipment_safety_id: int, session: Session = Depends(get_session), current_user = Depends(verify_token)):
-    equipment_safety = session.get(EquipmentSafety, equipment_safety_id)
+async def delete_equipment_safety(equipment_safety_id: int, session: AsyncSession = Depends(get_session), current_user = Depends(verify_token)):
+    equipment_safety = await session.get(EquipmentSafety, equipment_safety_id)
     if not equipment_safety:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Equipment Safety not found")
     if not current_user.admin:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Operation not permitted")
-    session.delete(equipment_safety)
-    session.commit()
\ No newline at end of file
+    await session.delete(equipment_safety)
+    await track_change(session, EquipmentSafety, before=equipment_safety)
+    await session.commit()
+    collection_versions.bump("equipment_safety")
+    change_hub.publish("equipment_safety", "deleted", equipment_safety_id)
+
+
+@router.post("/batch", response_model=BatchResult)
+async def batch_equipment_safety(operations: list[BatchOperation], session: AsyncSession = Depends(get_session), current_user = Depends(verify_token)):
+    if not current_user.admin:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Operation not permitted")
+    result = await apply_batch(session, EquipmentSafety, operations, EquipmentSafetyBase, EquipmentSafetyPartialUpdate)
+    collection_versions.bump("equipment_safety")
+    change_hub.publish("equipment_safety", "batch", data=batch_changes(result))
+    return result
+
+
+@router.post("/import", response_model=ImportJobPublic, status_code=status.HTTP_202_ACCEPTED)
+async def import_equipment_safety(request: Request, response: Response, format: Literal["ndjson", "csv"] = "ndjson", session: AsyncSession = Depends(get_session), current_user=Depends(verify_token)):
+    if not current_user.admin:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Operation not permitted")
+    job = await start_import(request, session, EquipmentSafety, EquipmentSafetyBase, "equipment_safety", format, current_user.id)
+    response.headers["Location"] = f"/imports/{job['id']}"
+    return job
@@ -0,0 +1,123 @@
+import asyncio
+import logging
+import re
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Request, WebSocket, WebSocketDisconnect, status
+from fastapi.responses import StreamingResponse
+from fastapi.security import OAuth2PasswordBearer
+
+from wayne_api.dependencies import authenticate_token, verify_token
+from wayne_api.schemas import UserPublic
+from wayne_api.events import COLLECTIONS, change_hub
+from wayne_api.settings import EVENTS_HEARTBEAT_SECONDS
+
+
+router = APIRouter(
+    prefix="/events",
+    tags=["Events"],
+)
+
+# EventSource e WebSocket do navegador não mandam header Authorization, então o token também vale via ?token=
+optional_oauth2_schema = OAuth2PasswordBearer(tokenUrl="auth/login-form", auto_error=False)
+
+_TOKEN_PARAM = re.compile(r"([?&]token=)[^&\s\"]*")
+
+
+def redact_query_token(record: logging.LogRecord):
+    """Logging filter hiding ?token= in the URLs uvicorn logs (access log and WebSocket handshakes)."""
+    if isinstance(record.args, tuple):
+        record.args = tuple(_TOKEN_PARAM.sub(r"\1[redacted]", arg) if isinstance(arg, str) else arg for arg in record.args)
+    return True
+
+
+for _logger_name in ("uvicorn.access", "uvicorn.error"):
+    logging.getLogger(_logger_name).addFilter(redact_query_token)
+
+
+def parse_collections(collections: Optional[str]):
+    if not collections:
+        return None
+    names = {name.strip() for name in collections.split(",") if name.strip()}
+    unknown = names - set(COLLECTIONS)
+    if unknown:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Unknown collections: {', '.join(sorted(unknown))}")
+    return names
+
+
+async def sse_events(collections):
+    # assina só quando o stream começa: um cliente que cai antes disso não deixa assinatura para trás
+    subscription = change_hub.subscribe(collections)
+    try:
+        yield "retry: 3000\n\n"
+        while True:
+            try:
+                message = await asyncio.wait_for(subscription.queue.get(), EVENTS_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                yield ": ping\n\n"
+                continue
+            if message is None:
+                # cliente lento foi descartado; o EventSource reconecta e deve recarregar as listas
+                yield "event: dropped\ndata: {}\n\n"
+                break
+            yield f"data: {message}\n\n"
+    finally:
+        change_hub.unsubscribe(subscription)
+
+
+@router.get("/stream")
+async def stream_events(
+    token: Optional[str] = None,
+    collections: Optional[str] = None,
+    header_token: Optional[str] = Depends(optional_oauth2_schema),
+):
+    """Server-Sent Events feed. Send the JWT as ``Authorization: Bearer``; ``?token=`` is
+    only a fallback for the browser EventSource, which can't set headers (uvicorn's logs
+    redact it, but proxies in front may still record the URL)."""
+    await authenticate_token(header_token or token or "")
+    return StreamingResponse(
+        sse_events(parse_collections(collections)),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+async def _forward(websocket: WebSocket, subscription):
+    while (message := await subscription.queue.get()) is not None:
+        await websocket.send_text(message)
+    await websocket.close(code=status.WS_1013_TRY_AGAIN_LATER)
+
+
+async def _wait_disconnect(websocket: WebSocket):
+    # mensagens do cliente são ignoradas; só importa perceber a desconexão
+    while True:
+        await websocket.receive_text()
+
+
+@router.websocket("/ws")
+async def websocket_events(websocket: WebSocket, token: Optional[str] = None, collections: Optional[str] = None):
+    try:
+        await authenticate_token(token or "")
+        names = parse_collections(collections)
+    except HTTPException:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    await websocket.accept()
+    subscription = change_hub.subscribe(names)
+    tasks = [asyncio.create_task(_forward(websocket, subscription)), asyncio.create_task(_wait_disconnect(websocket))]
+    try:
+        done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in pending:
+            task.cancel()
+        for task in done:
+            if task.exception() and not isinstance(task.exception(), WebSocketDisconnect):
+                raise task.exception()
+    finally:
+        change_hub.unsubscribe(subscription)
+
+
+@router.get("/stats")
+async def events_stats(current_user: UserPublic = Depends(verify_token)):
+    if not current_user.admin:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Operation not permitted")
+    return change_hub.stats()
@@ -0,0 +1,33 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from wayne_api.database import get_session
+from wayne_api.models import ImportJob
+from wayne_api.schemas import ImportJobList, ImportJobPublic
+from wayne_api.dependencies import verify_token
+from wayne_api.imports import job_public
+
+router = APIRouter(
+    prefix="/imports",
+    tags=["Imports"],
+    dependencies=[Depends(verify_token)],
+)
+
+
+@router.get("/", response_model=ImportJobList)
+async def list_imports(limit: int = Query(20, ge=1, le=100), session: AsyncSession = Depends(get_session), current_user=Depends(verify_token)):
+    if not current_user.admin:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Operation not permitted")
+    jobs = await session.scalars(select(ImportJob).order_by(ImportJob.created_at.desc()).limit(limit))
+    return {"jobs": [job_public(job) for job in jobs]}
+
+
+@router.get("/{job_id}", response_model=ImportJobPublic)
+async def get_import(job_id: str, session: AsyncSession = Depends(get_session), current_user=Depends(verify_token)):
+    if not current_user.admin:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Operation not permitted")
+    job = await session.get(ImportJob, job_id)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Import job not found")
+    return job_public(job)
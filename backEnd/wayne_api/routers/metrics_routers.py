@@ -0,0 +1,42 @@
+from fastapi import APIRouter, Depends
+from fastapi.responses import PlainTextResponse
+
+from wayne_api.cache import user_cache
+from wayne_api.compression import compressed_cache
+from wayne_api.dependencies import verify_metrics_access
+from wayne_api.events import change_hub
+from wayne_api.metrics import metrics, render_counter, render_gauge, render_histogram
+from wayne_api.passwords import password_pool
+from wayne_api.ratelimit import login_limiter
+from wayne_api.warmup import startup_timings
+from wayne_api.writebehind import equipment_safety_writes
+
+router = APIRouter(tags=["Metrics"], dependencies=[Depends(verify_metrics_access)])
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    body = metrics.render()
+    body += render_counter("wayne_user_cache_hits", "verify_token cache hits since start.", user_cache.hits)
+    body += render_counter("wayne_user_cache_misses", "verify_token cache misses since start.", user_cache.misses)
+    body += render_gauge("wayne_password_pool_pending", "bcrypt operations queued or running.", password_pool.pending)
+    body += render_counter("wayne_password_pool_rejected", "bcrypt operations rejected with 503 since start.", password_pool.rejected)
+    body += render_gauge("wayne_events_subscribers", "Open /events subscriptions.", change_hub.stats()["subscribers"])
+    body += render_counter("wayne_events_dropped", "Slow /events subscribers dropped since start.", change_hub.dropped)
+    body += render_gauge("wayne_login_in_flight", "Logins being verified right now.", login_limiter.in_flight)
+    body += render_counter("wayne_login_rejected", "Login attempts shed with 429 since start.", login_limiter.rejected)
+    body += render_gauge("wayne_cold_start_seconds", "Time from process start (or fork) until this worker was ready.", startup_timings.get("cold_start_seconds", 0))
+    body += render_gauge("wayne_warmup_seconds", "Time spent in the startup warmup.", startup_timings.get("warmup_seconds", 0))
+    body += render_counter("wayne_compression_cache_hits", "Compressed bodies served from the ETag cache since start.", compressed_cache.hits)
+    body += render_counter("wayne_compression_cache_misses", "Cacheable bodies that had to be compressed since start.", compressed_cache.misses)
+    body += render_gauge("wayne_compression_cache_bytes", "Bytes held by the compressed body cache.", compressed_cache.bytes)
+    body += render_gauge("wayne_write_behind_pending", "Equipment-safety ids waiting for the next write-behind flush.", equipment_safety_writes.pending)
+    body += render_counter("wayne_write_behind_submitted", "PATCHes accepted by the write-behind queue since start.", equipment_safety_writes.submitted)
+    body += render_counter("wayne_write_behind_coalesced", "PATCHes merged into a write already queued for the same id.", equipment_safety_writes.coalesced)
+    body += render_counter("wayne_write_behind_rejected", "PATCHes rejected with 503 because the queue was full.", equipment_safety_writes.rejected)
+    body += render_counter("wayne_write_behind_failures", "Write-behind flushes that failed and were retried one id at a time.", equipment_safety_writes.failures)
+    body += render_counter("wayne_write_behind_dropped", "Write-behind updates discarded after WRITE_BEHIND_MAX_ATTEMPTS failed flushes.", equipment_safety_writes.dropped)
+    body += render_histogram("wayne_write_behind_flush_seconds", "Duration of each write-behind transaction.", equipment_safety_writes.flush_seconds)
+    body += render_histogram("wayne_write_behind_queue_delay_seconds", "Age of the oldest write in a batch when its flush committed.", equipment_safety_writes.queue_delay_seconds)
+    body += render_histogram("wayne_write_behind_batch_size", "Distinct ids written per write-behind flush.", equipment_safety_writes.batch_sizes)
+    return PlainTextResponse(body, media_type="text/plain; version=0.0.4")
@@ -0,0 +1,57 @@
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from wayne_api.database import get_session
+from wayne_api.schemas import SearchResults
+from wayne_api.dependencies import verify_token
+
+router = APIRouter(
+    prefix="/search",
+    tags=["Search"],
+    dependencies=[Depends(verify_token)],
+)
+
+
+# cada tabela FTS5 devolve seus melhores resultados por rank (bm25 ponderado, ver migração);
+# a união só ordena no máximo 2 * limit linhas
+FTS_QUERY = """
+SELECT '{kind}' AS kind, {table}.id AS id, {table}.name AS name,
+       snippet({table}_fts, -1, '[', ']', '…', 12) AS snippet,
+       {table}_fts.rank AS score
+FROM {table}_fts JOIN {table} ON {table}.id = {table}_fts.rowid
+WHERE {table}_fts MATCH :q
+ORDER BY rank
+LIMIT :limit
+"""
+
+SEARCH_TABLES = {"equipment": "equipment", "equipment_safety": "equipment_safety"}
+
+
+def build_match_query(q: str):
+    """Turns free text into an FTS5 query: every term is quoted (AND), a trailing * keeps prefix search."""
+    terms = []
+    for term in q.split():
+        prefix = term.endswith("*")
+        term = term.rstrip("*").replace('"', '""')
+        if term:
+            terms.append(f'"{term}"' + ("*" if prefix else ""))
+    return " ".join(terms)
+
+
+@router.get("/", response_model=SearchResults)
+async def search(q: str = Query(..., min_length=1), kind: Optional[Literal["equipment", "equipment_safety"]] = None, limit: int = Query(20, ge=1, le=100), session: AsyncSession = Depends(get_session)):
+    match_query = build_match_query(q)
+    if not match_query:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Empty search query")
+    kinds = [kind] if kind else list(SEARCH_TABLES)
+    subqueries = [f"SELECT * FROM ({FTS_QUERY.format(kind=name, table=SEARCH_TABLES[name])})" for name in kinds]
+    statement = text(" UNION ALL ".join(subqueries) + " ORDER BY score LIMIT :limit")
+    try:
+        result = await session.execute(statement, {"q": match_query, "limit": limit})
+    except OperationalError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid search query")
+    return {"hits": result.mappings().all()}
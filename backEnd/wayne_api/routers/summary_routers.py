@@ -0,0 +1,18 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from wayne_api.database import get_session
+from wayne_api.schemas import Summary
+from wayne_api.dependencies import verify_token
+from wayne_api.summary import read_summary
+
+router = APIRouter(
+    prefix="/summary",
+    tags=["Summary"],
+    dependencies=[Depends(verify_token)],
+)
+
+
+@router.get("/", response_model=Summary)
+async def get_summary(session: AsyncSession = Depends(get_session)):
+    return await read_summary(session)
@@ -1,11 +1,23 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
 from sqlalchemy import select
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from wayne_api.database import get_session
 from wayne_api.models import Vehicle
-from wayne_api.schemas import VehicleBase, VehiclePublic, VehiclePartialUpdate, VehicleList
+from wayne_api.schemas import VehicleBase, VehiclePublic, VehiclePartialUpdate, VehicleList, BatchOperation, BatchResult, ImportJobPublic
 from wayne_api.dependencies import verify_token
+from wayne_api.pagination import paginate
+from wayne_api.batch import apply_batch
+from wayne_api.export import export_response
+from wayne_api.imports import start_import
+from wayne_api.etag import collection_versions, conditional_get
+from wayne_api.summary import counter_snapshot, track_change
+from wayne_api.events import batch_changes, change_hub
+from wayne_api.counts import estimated_rows, list_total
+from wayne_api.fastjson import item_response, list_response, public_columns, sparse_fields
+from wayne_api.settings import FAST_JSON, LIST_SEEK_INDEX_MAX_ROWS
 
 
 router = APIRouter(
@@ -14,68 +26,142 @@ router = APIRouter(
     dependencies=[Depends(verify_token)],
 )
 
+VEHICLE_COLUMNS = public_columns(Vehicle, VehiclePublic)
+
 
 @router.post("/", response_model=VehiclePublic, status_code=status.HTTP_201_CREATED)
-def create_vehicle(vehicle: VehicleBase, session: Session = Depends(get_session), current_user=Depends(verify_token)):
+async def create_vehicle(vehicle: VehicleBase, session: AsyncSession = Depends(get_session), current_user=Depends(verify_token)):
     if not current_user.admin:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Operation not permitted")
     vehicle = Vehicle(**vehicle.model_dump())
     session.add(vehicle)
-    session.commit()
-    session.refresh(vehicle)
+    await track_change(session, Vehicle, after=vehicle)
+    await session.commit()
+    collection_versions.bump("vehicles")
+    await session.refresh(vehicle)
+    change_hub.publish("vehicles", "created", vehicle.id, VehiclePublic.model_validate(vehicle).model_dump())
     return vehicle
 
 
-@router.get("/", response_model=VehicleList, status_code=status.HTTP_200_OK)
-def list_vehicles(offset: int = 0, limit: int = 10, session: Session = Depends(get_session)):
-    query = session.scalars(select(Vehicle).offset(offset).limit(limit))
-    vehicles = query.all()
-    return {"vehicle": vehicles}
+@router.get("/", response_model=VehicleList, dependencies=[Depends(conditional_get("vehicles"))], status_code=status.HTTP_200_OK)
+async def list_vehicles(
+    response: Response,
+    offset: int = 0,
+    limit: int = Query(10, ge=1),
+    after: Optional[str] = None,
+    type: Optional[str] = None,
+    year_min: Optional[int] = None,
+    year_max: Optional[int] = None,
+    sort: Literal["id", "-id", "year", "-year"] = "id",
+    fields = Depends(sparse_fields(Vehicle, VehiclePublic)),
+    count: Literal["estimate", "exact", "none"] = "estimate",
+    session: AsyncSession = Depends(get_session),
+):
+    query = select(Vehicle)
+    if type is not None:
+        query = query.where(Vehicle.type == type)
+    if year_min is not None:
+        query = query.where(Vehicle.year >= year_min)
+    if year_max is not None:
+        query = query.where(Vehicle.year <= year_max)
+    total = await list_total(session, "vehicles", Vehicle, query, {"type": type, "year_min": year_min, "year_max": year_max}, count, response)
+    # só faixa de ano, ordem por id: nenhum índice dá as duas coisas. Faixa estreita busca por ix_vehicles_year e
+    # ordena; faixa larga percorre o id e para quando a página enche
+    seek_year_index = False
+    if sort in ("id", "-id") and type is None and (year_min is not None or year_max is not None):
+        estimate = await estimated_rows(session, "vehicles", {"year_min": year_min, "year_max": year_max})
+        seek_year_index = estimate is not None and estimate <= LIST_SEEK_INDEX_MAX_ROWS
+    if fields is not None or FAST_JSON:
+        columns = fields or VEHICLE_COLUMNS
+        rows, next_cursor = await paginate(session, query, Vehicle, limit, offset, after, sort, columns=columns, seek_filter_index=seek_year_index)
+        return list_response("vehicle", columns, rows, next_cursor, response, total)
+    vehicles, next_cursor = await paginate(session, query, Vehicle, limit, offset, after, sort, seek_filter_index=seek_year_index)
+    return {"vehicle": vehicles, "next_cursor": next_cursor, "total": total}
+
 
+@router.get("/export")
+async def export_vehicles(format: Literal["ndjson", "csv"] = "ndjson", fields = Depends(sparse_fields(Vehicle, VehiclePublic))):
+    return export_response(fields or VEHICLE_COLUMNS, format, "vehicles")
 
-@router.get("/{vehicle_id}", response_model=VehiclePublic, status_code=status.HTTP_200_OK)
-def get_vehicle(vehicle_id: int, session: Session = Depends(get_session)):
-    vehicle = session.get(Vehicle, vehicle_id)
+
+@router.get("/{vehicle_id}", response_model=VehiclePublic, dependencies=[Depends(conditional_get("vehicles"))], status_code=status.HTTP_200_OK)
+async def get_vehicle(vehicle_id: int, response: Response, fields = Depends(sparse_fields(Vehicle, VehiclePublic)), session: AsyncSession = Depends(get_session)):
+    if fields is not None:
+        row = (await session.execute(select(*fields).where(Vehicle.id == vehicle_id))).first()
+        if row is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Vehicle not found")
+        return item_response(fields, row, response)
+    vehicle = await session.get(Vehicle, vehicle_id)
     if not vehicle:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Vehicle not found")
     return vehicle
 
 
 @router.put("/{vehicle_id}", response_model=VehiclePublic, status_code=status.HTTP_201_CREATED)
-def update_vehicle(vehicle_id: int, updated_vehicle: VehicleBase, session: Session = Depends(get_session), current_user=Depends(verify_token)):
-    vehicle = session.get(Vehicle, vehicle_id)
+async def update_vehicle(vehicle_id: int, updated_vehicle: VehicleBase, session: AsyncSession = Depends(get_session), current_user=Depends(verify_token)):
+    vehicle = await session.get(Vehicle, vehicle_id)
     if not vehicle:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Vehicle not found")
     if not current_user.admin:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Operation not permitted")
+    before = counter_snapshot(Vehicle, vehicle)
     for key, value in updated_vehicle.model_dump().items():
         setattr(vehicle, key, value)
-    session.commit()
-    session.refresh(vehicle)
+    await track_change(session, Vehicle, before=before, after=vehicle)
+    await session.commit()
+    collection_versions.bump("vehicles")
+    await session.refresh(vehicle)
+    change_hub.publish("vehicles", "updated", vehicle.id, VehiclePublic.model_validate(vehicle).model_dump())
     return vehicle
 
 
 @router.patch("/{vehicle_id}", response_model=VehiclePublic, status_code=status.HTTP_201_CREATED)
-def partial_update_vehicle(vehicle_id: int, vehicle_update: VehiclePartialUpdate, session: Session = Depends(get_session), current_user=Depends(verify_token)):
-    vehicle = session.get(Vehicle, vehicle_id)
+async def partial_update_vehicle(vehicle_id: int, vehicle_update: VehiclePartialUpdate, session: AsyncSession = Depends(get_session), current_user=Depends(verify_token)):
+    vehicle = await session.get(Vehicle, vehicle_id)
     if not vehicle:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Vehicle not found")
     if not current_user.admin:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Operation not permitted")
     update_data = vehicle_update.model_dump(exclude_unset=True)
+    before = counter_snapshot(Vehicle, vehicle)
     for key, value in update_data.items():
         setattr(vehicle, key, value)
-    session.commit()
-    session.refresh(vehicle)
+    await track_change(session, Vehicle, before=before, after=vehicle)
+    await session.commit()
+    collection_versions.bump("vehicles")
+    await session.refresh(vehicle)
+    change_hub.publish("vehicles", "updated", vehicle.id, VehiclePublic.model_validate(vehicle).model_dump())
     return vehicle
 
 
 @router.delete("/{vehicle_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_vehicle(vehicle_id: int, session: Session = Depends(get_session), current_user=Depends(verify_token)):
-    vehicle = session.get(Vehicle, vehicle_id)
+async def delete_vehicle(vehicle_id: int, session: AsyncSession = Depends(get_session), current_user=Depends(verify_token)):
+    vehicle = await session.get(Vehicle, vehicle_id)
     if not vehicle:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Vehicle not found")
     if not current_user.admin:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Operation not permitted")
-    session.delete(vehicle)
-    session.commit()
\ No newline at end of file
+    await session.delete(vehicle)
+    await track_change(session, Vehicle, before=vehicle)
+    await session.commit()
+    collection_versions.bump("vehicles")
+    change_hub.publish("vehicles", "deleted", vehicle_id)
+
+
+@router.post("/batch", response_model=BatchResult)
+async def batch_vehicle(operations: list[BatchOperation], session: AsyncSession = Depends(get_session), current_user=Depends(verify_token)):
+    if not current_user.admin:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Operation not permitted")
+    result = await apply_batch(session, Vehicle, operations, VehicleBase, VehiclePartialUpdate)
+    collection_versions.bump("vehicles")
+    change_hub.publish("vehicles", "batch", data=batch_changes(result))
+    return result
+
+
+@router.post("/import", response_model=ImportJobPublic, status_code=status.HTTP_202_ACCEPTED)
+async def import_vehicle(request: Request, response: Response, format: Literal["ndjson", "csv"] = "ndjson", session: AsyncSession = Depends(get_session), current_user=Depends(verify_token)):
+    if not current_user.admin:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Operation not permitted")
+    job = await start_import(request, session, Vehicle, VehicleBase, "vehicles", format, current_user.id)
+    response.headers["Location"] = f"/imports/{job['id']}"
+    return job
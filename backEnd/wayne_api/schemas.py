@@ -1,4 +1,5 @@
-from typing import Optional
+from datetime import datetime
+from typing import Any, Literal, Optional
 from pydantic import BaseModel
 
 
@@ -31,6 +32,8 @@ class VehiclePartialUpdate(BaseModel):
 
 class VehicleList(BaseModel):
     vehicle: list[VehiclePublic]
+    next_cursor: Optional[str] = None
+    total: Optional[int] = None # X-Total-Count (None com count=none)
 
 # Equipment Schemas
 class EquipmentBase(BaseModel):
@@ -57,11 +60,13 @@ class EquipmentPartialUpdate(BaseModel):
 
 class EquipmentList(BaseModel):
     equipment: list[EquipmentPublic]
+    next_cursor: Optional[str] = None
+    total: Optional[int] = None # X-Total-Count (None com count=none)
 
 # Equipment Safety Schemas
 class EquipmentSafetyBase(BaseModel):
     name: str
-    status: Optional[str] = None
+    status: Optional[bool] = None # True for operational, False for non-operational
     description: str
 
     class Config:
@@ -70,7 +75,7 @@ class EquipmentSafetyBase(BaseModel):
 class EquipmentSafetyPublic(BaseModel):
     id: int
     name: str
-    status: Optional[str] = None
+    status: Optional[bool] = None # True for operational, False for non-operational
     description: str
 
     class Config:
@@ -78,7 +83,7 @@ class EquipmentSafetyPublic(BaseModel):
 
 class EquipmentSafetyPartialUpdate(BaseModel):
     name: Optional[str] = None
-    status: Optional[str] = None
+    status: Optional[bool] = None # True for operational, False for non-operational
     description: Optional[str] = None
 
     class Config:
@@ -86,6 +91,86 @@ class EquipmentSafetyPartialUpdate(BaseModel):
 
 class EquipmentSafetyList(BaseModel):
     equipmentSafety: list[EquipmentSafetyPublic]
+    next_cursor: Optional[str] = None
+    total: Optional[int] = None # X-Total-Count (None com count=none)
+
+class EquipmentSafetyStatusAtItem(BaseModel):
+    id: int
+    status: Optional[bool] = None
+
+class EquipmentSafetyStatusAt(BaseModel):
+    at: datetime
+    items: list[EquipmentSafetyStatusAtItem]
+
+class EquipmentSafetyDowntimeItem(BaseModel):
+    id: int
+    down_seconds: float
+
+class EquipmentSafetyDowntime(BaseModel):
+    start: datetime
+    end: datetime
+    items: list[EquipmentSafetyDowntimeItem]
+
+
+# Batch Schemas
+class BatchOperation(BaseModel):
+    op: Literal["create", "update", "delete"]
+    id: Optional[int] = None
+    data: Optional[dict[str, Any]] = None
+
+class BatchItemResult(BaseModel):
+    index: int
+    op: str
+    id: Optional[int] = None
+    status: str # created, updated, deleted, not_found, invalid
+    detail: Optional[str] = None
+
+class BatchResult(BaseModel):
+    results: list[BatchItemResult]
+
+
+# Import Schemas
+class ImportRowError(BaseModel):
+    row: int # linha do arquivo
+    detail: str
+
+class ImportJobPublic(BaseModel):
+    id: str
+    collection: str
+    format: str
+    status: str # queued, running, done, failed, interrupted
+    rows_processed: int
+    rows_inserted: int
+    rows_failed: int
+    rows_per_second: float
+    errors: list[ImportRowError] # só as primeiras IMPORT_MAX_ERRORS
+    detail: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+class ImportJobList(BaseModel):
+    jobs: list[ImportJobPublic]
+
+
+# Search Schemas
+class SearchHit(BaseModel):
+    kind: str # equipment, equipment_safety
+    id: int
+    name: str
+    snippet: str
+    score: float
+
+class SearchResults(BaseModel):
+    hits: list[SearchHit]
+
+
+# Summary Schemas
+class Summary(BaseModel):
+    totals: dict[str, int]
+    vehicles_by_type: dict[str, int]
+    vehicles_by_year: dict[str, int]
+    equipment_safety_by_status: dict[str, int]
 
 
 # User Schemas
@@ -0,0 +1,176 @@
+"""Production launcher: imports the app once, then forks N uvicorn workers on one socket.
+
+    python -m wayne_api.serve --workers 4 --host 0.0.0.0 --port 8000
+
+Workers share nothing but the listening socket and the collection versions file
+(ETags and the /events feed stay consistent across processes). Each one warms up
+on startup and reports its cold start; SIGTERM/SIGINT drain in-flight requests for
+up to --graceful-timeout seconds before the workers exit. Crashed workers are
+replaced. Without os.fork (Windows) it falls back to uvicorn's own multi-worker mode.
+"""
+import argparse
+import logging
+import os
+import shutil
+import signal
+import socket
+import sys
+import tempfile
+import threading
+import time
+
+
+logger = logging.getLogger("uvicorn.error")
+
+
+def parse_args(argv=None):
+    from wayne_api.settings import SERVER_WORKERS, SERVER_GRACEFUL_TIMEOUT
+
+    parser = argparse.ArgumentParser(description="Run the Wayne API with N preloaded uvicorn workers")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=SERVER_WORKERS)
+    parser.add_argument("--graceful-timeout", type=float, default=SERVER_GRACEFUL_TIMEOUT, help="seconds to drain in-flight requests on shutdown")
+    parser.add_argument("--proxy-headers", action="store_true", help="trust X-Forwarded-For/Proto (see --forwarded-allow-ips)")
+    parser.add_argument("--forwarded-allow-ips", default="127.0.0.1")
+    parser.add_argument("--log-level", default="info")
+    return parser.parse_args(argv)
+
+
+def _bind(host: str, port: int):
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+def _run_worker(config, sock, read_fd: int, ready_fd: int):
+    import uvicorn
+
+    from wayne_api import warmup
+    from wayne_api.database import sync_engines
+    from wayne_api.events import change_hub
+
+    # o filho não herda o tratamento de sinais do master; o uvicorn instala o seu no serve()
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    # grupo próprio: um Ctrl+C no terminal chega só ao master, que repassa um único SIGTERM
+    os.setpgid(0, 0)
+    os.close(read_fd)
+    warmup.startup_timings["started"] = time.perf_counter()
+    warmup.on_ready = lambda timings: os.write(ready_fd, f"{os.getpid()} {timings['cold_start_seconds']:.6f}\n".encode())
+    # conexões abertas no master (se houver) não podem ser usadas por dois processos
+    for engine in sync_engines():
+        engine.dispose(close=False)
+
+    class Server(uvicorn.Server):
+        async def shutdown(self, sockets=None):
+            # encerra os streams do /events antes do dreno; o EventSource reconecta em outro worker
+            change_hub.close()
+            await super().shutdown(sockets=sockets)
+
+    Server(config).run(sockets=[sock])
+
+
+def _report_ready(read_fd: int, workers: int, launched_at: float):
+    ready = 0
+    with os.fdopen(read_fd) as pipe:
+        for line in pipe:
+            ready += 1
+            if ready == workers:
+                logger.info("All %d workers ready %.0f ms after launch", workers, (time.perf_counter() - launched_at) * 1000)
+
+
+def _serve_forked(args, launched_at: float):
+    import uvicorn
+
+    from wayne_api.app import app
+
+    config = uvicorn.Config(
+        app, host=args.host, port=args.port, timeout_graceful_shutdown=args.graceful_timeout,
+        proxy_headers=args.proxy_headers, forwarded_allow_ips=args.forwarded_allow_ips, log_level=args.log_level,
+    )
+    logger.info("Preloaded app in %.0f ms", (time.perf_counter() - launched_at) * 1000)
+
+    sock = _bind(args.host, args.port)
+    read_fd, ready_fd = os.pipe()
+    threading.Thread(target=_report_ready, args=(read_fd, args.workers, launched_at), daemon=True).start()
+
+    workers = set()
+    stopping = False
+    spawned_at = [0.0]
+
+    def spawn():
+        spawned_at[0] = time.monotonic()
+        pid = os.fork()
+        if pid == 0:
+            try:
+                _run_worker(config, sock, read_fd, ready_fd)
+            finally:
+                os._exit(0)
+        workers.add(pid)
+
+    def stop(signum, frame):
+        nonlocal stopping
+        if stopping:
+            return
+        stopping = True
+        logger.info("Shutting down %d workers (graceful timeout %.0fs)", len(workers), args.graceful_timeout)
+        for pid in list(workers):
+            os.kill(pid, signal.SIGTERM)
+        # quem não drenar a tempo é encerrado à força
+        signal.signal(signal.SIGALRM, lambda *_: [os.kill(pid, signal.SIGKILL) for pid in list(workers)])
+        signal.alarm(int(args.graceful_timeout) + 5)
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    logger.info("Listening on http://%s:%d with %d workers", args.host, args.port, args.workers)
+    for _ in range(args.workers):
+        spawn()
+
+    while workers:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        workers.discard(pid)
+        if not stopping:
+            logger.warning("Worker %d exited (status %d), starting a new one", pid, os.waitstatus_to_exitcode(status))
+            # evita um loop de fork quando o worker morre logo no boot
+            if time.monotonic() - spawned_at[0] < 1:
+                time.sleep(1)
+            spawn()
+
+    sock.close()
+    logger.info("All workers stopped")
+
+
+def main(argv=None):
+    launched_at = time.perf_counter()
+    # versões das coleções compartilhadas entre os workers; o env precisa vir antes de importar wayne_api.settings
+    shared_dir = tempfile.mkdtemp(prefix="wayne-")
+    os.environ["SHARED_STATE_PATH"] = os.path.join(shared_dir, "collection_versions")
+    try:
+        args = parse_args(argv)
+        # cria o arquivo de versões antes de qualquer worker existir
+        from wayne_api.etag import collection_versions  # noqa: F401
+
+        if hasattr(os, "fork"):
+            _serve_forked(args, launched_at)
+        else:
+            import uvicorn
+
+            uvicorn.run(
+                "wayne_api.app:app", host=args.host, port=args.port, workers=args.workers,
+                timeout_graceful_shutdown=args.graceful_timeout, proxy_headers=args.proxy_headers,
+                forwarded_allow_ips=args.forwarded_allow_ips, log_level=args.log_level,
+            )
+    finally:
+        shutil.rmtree(shared_dir, ignore_errors=True)
+
+if __name__ == "__main__":
+    sys.exit(main())
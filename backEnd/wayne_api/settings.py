@@ -0,0 +1,101 @@
+import os
+from dotenv import load_dotenv
+
+
+load_dotenv()
+
+SECRET_KEY = os.getenv("SECRET_KEY")
+ALGORITHM = os.getenv("ALGORITHM")
+ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", 30))
+
+# "async" usa AsyncSession (aiosqlite); "sync" mantém o Session síncrono para comparação
+DATABASE_MODE = os.getenv("DATABASE_MODE", "async")
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./wayne.db")
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL", "sqlite+aiosqlite:///./wayne.db")
+
+# Cache do usuário autenticado em verify_token
+USER_CACHE_TTL_SECONDS = float(os.getenv("USER_CACHE_TTL_SECONDS", 60))
+USER_CACHE_MAX_SIZE = int(os.getenv("USER_CACHE_MAX_SIZE", 1024))
+
+# Hash de senhas: custo do bcrypt e pool dedicado ("thread" ou "process")
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", 12))
+PASSWORD_POOL_KIND = os.getenv("PASSWORD_POOL_KIND", "thread")
+PASSWORD_POOL_WORKERS = int(os.getenv("PASSWORD_POOL_WORKERS", os.cpu_count() or 2))
+PASSWORD_POOL_MAX_PENDING = int(os.getenv("PASSWORD_POOL_MAX_PENDING", 64))
+
+# Máximo de operações aceitas por requisição nos endpoints /batch
+BATCH_MAX_SIZE = int(os.getenv("BATCH_MAX_SIZE", 1000))
+
+# Linhas buscadas por vez (yield_per) nos endpoints /export
+EXPORT_CHUNK_SIZE = int(os.getenv("EXPORT_CHUNK_SIZE", 1000))
+
+# Listas por id com faixa de ano: até essa estimativa de linhas busca pelo índice de year e ordena os resultados
+LIST_SEEK_INDEX_MAX_ROWS = int(os.getenv("LIST_SEEK_INDEX_MAX_ROWS", 10000))
+
+# Perfil do SQLite: "default" (padrões do SQLite) ou "production" (WAL, pragmas e engines leitor/escritor)
+DATABASE_PROFILE = os.getenv("DATABASE_PROFILE", "default")
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", 5000))
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", 268435456))
+SQLITE_CACHE_SIZE = int(os.getenv("SQLITE_CACHE_SIZE", -64000))
+SQLITE_READ_POOL_SIZE = int(os.getenv("SQLITE_READ_POOL_SIZE", 5))
+
+# Feed de alterações (/events): fila por cliente e intervalo de heartbeat do SSE
+EVENTS_QUEUE_SIZE = int(os.getenv("EVENTS_QUEUE_SIZE", 100))
+EVENTS_HEARTBEAT_SECONDS = float(os.getenv("EVENTS_HEARTBEAT_SECONDS", 15))
+
+# Métricas: middleware de latência/SQL, header Server-Timing e log de requisições lentas (0 desativa)
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() in ("1", "true", "yes")
+SERVER_TIMING_ENABLED = os.getenv("SERVER_TIMING_ENABLED", "true").lower() in ("1", "true", "yes")
+SLOW_REQUEST_MS = float(os.getenv("SLOW_REQUEST_MS", 500))
+SLOW_REQUEST_MAX_STATEMENTS = int(os.getenv("SLOW_REQUEST_MAX_STATEMENTS", 50))
+# /metrics exige admin ou o token do scraper (Authorization: Bearer <METRICS_TOKEN>); METRICS_PUBLIC=true libera sem autenticação
+METRICS_TOKEN = os.getenv("METRICS_TOKEN") or None
+METRICS_PUBLIC = os.getenv("METRICS_PUBLIC", "false").lower() in ("1", "true", "yes")
+
+# Caminho rápido de serialização: respostas com orjson e listas montadas direto das colunas
+FAST_JSON = os.getenv("FAST_JSON", "false").lower() in ("1", "true", "yes")
+
+# Limite de tentativas de login (token bucket por IP e por email; taxa 0 desativa) e teto de logins simultâneos
+LOGIN_IP_RATE_PER_MINUTE = float(os.getenv("LOGIN_IP_RATE_PER_MINUTE", 30))
+LOGIN_IP_BURST = int(os.getenv("LOGIN_IP_BURST", 10))
+LOGIN_EMAIL_RATE_PER_MINUTE = float(os.getenv("LOGIN_EMAIL_RATE_PER_MINUTE", 10))
+LOGIN_EMAIL_BURST = int(os.getenv("LOGIN_EMAIL_BURST", 5))
+LOGIN_LIMITER_MAX_KEYS = int(os.getenv("LOGIN_LIMITER_MAX_KEYS", 10000))
+LOGIN_MAX_IN_FLIGHT = int(os.getenv("LOGIN_MAX_IN_FLIGHT", 32))
+
+# Launcher multi-worker (python -m wayne_api.serve); SHARED_STATE_PATH é definido pelo próprio launcher
+SERVER_WORKERS = int(os.getenv("SERVER_WORKERS", os.cpu_count() or 1))
+SERVER_GRACEFUL_TIMEOUT = float(os.getenv("SERVER_GRACEFUL_TIMEOUT", 30))
+SHARED_STATE_PATH = os.getenv("SHARED_STATE_PATH")
+WARMUP_ON_STARTUP = os.getenv("WARMUP_ON_STARTUP", "true").lower() in ("1", "true", "yes")
+EVENTS_POLL_SECONDS = float(os.getenv("EVENTS_POLL_SECONDS", 0.5))
+
+# Write-behind do PATCH de /equipment-safety: agrupa as escritas e grava num único commit a cada intervalo ou lote cheio
+WRITE_BEHIND_ENABLED = os.getenv("WRITE_BEHIND_ENABLED", "false").lower() in ("1", "true", "yes")
+WRITE_BEHIND_FLUSH_MS = float(os.getenv("WRITE_BEHIND_FLUSH_MS", 50))
+WRITE_BEHIND_MAX_BATCH = int(os.getenv("WRITE_BEHIND_MAX_BATCH", 500))
+WRITE_BEHIND_MAX_PENDING = int(os.getenv("WRITE_BEHIND_MAX_PENDING", 10000))
+WRITE_BEHIND_MAX_ATTEMPTS = int(os.getenv("WRITE_BEHIND_MAX_ATTEMPTS", 3))
+
+# Histórico de status de /equipment-safety: intervalo da compactação em snapshots diários (0 desativa no app)
+HISTORY_COMPACT_INTERVAL_SECONDS = float(os.getenv("HISTORY_COMPACT_INTERVAL_SECONDS", 3600))
+
+# Compressão negociada por Accept-Encoding (br e zstd só se os pacotes brotli/zstandard estiverem instalados)
+COMPRESSION_ENABLED = os.getenv("COMPRESSION_ENABLED", "true").lower() in ("1", "true", "yes")
+COMPRESSION_ENCODINGS = [name.strip() for name in os.getenv("COMPRESSION_ENCODINGS", "zstd,br,gzip").split(",") if name.strip()]
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", 1024))
+COMPRESSION_GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL", 6))
+COMPRESSION_BROTLI_QUALITY = int(os.getenv("COMPRESSION_BROTLI_QUALITY", 4))
+COMPRESSION_ZSTD_LEVEL = int(os.getenv("COMPRESSION_ZSTD_LEVEL", 3))
+COMPRESSION_CACHE_BYTES = int(os.getenv("COMPRESSION_CACHE_BYTES", 32 * 1024 * 1024))
+
+# Totais das listagens (X-Total-Count): cache por versão da coleção e limite da contagem no modo estimate
+COUNT_CACHE_MAX_SIZE = int(os.getenv("COUNT_CACHE_MAX_SIZE", 1024))
+COUNT_CACHE_TTL_SECONDS = float(os.getenv("COUNT_CACHE_TTL_SECONDS", 300))
+COUNT_ESTIMATE_SCAN_LIMIT = int(os.getenv("COUNT_ESTIMATE_SCAN_LIMIT", 10000))
+
+# Importação em massa (POST /<recurso>/import): linhas por transação, tamanho máximo do arquivo e erros guardados por job
+IMPORT_CHUNK_SIZE = int(os.getenv("IMPORT_CHUNK_SIZE", 1000))
+IMPORT_MAX_BYTES = int(os.getenv("IMPORT_MAX_BYTES", 256 * 1024 * 1024))
+IMPORT_MAX_ERRORS = int(os.getenv("IMPORT_MAX_ERRORS", 100))
+IMPORT_TEMP_DIR = os.getenv("IMPORT_TEMP_DIR") or None
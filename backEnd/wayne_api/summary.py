@@ -0,0 +1,121 @@
+import argparse
+from collections import Counter
+
+from sqlalchemy import delete, insert, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from wayne_api.models import SummaryCounter, Vehicle, Equipment, EquipmentSafety
+
+
+# colunas de cada tabela que alimentam os contadores do /summary
+TRACKED_FIELDS = {
+    "vehicles": ("type", "year"),
+    "equipment": (),
+    "equipment_safety": ("status",),
+}
+
+
+def year_bucket(year):
+    if year is None:
+        return "unknown"
+    return str(year - year % 10)
+
+
+def status_bucket(status):
+    if status is None:
+        return "unknown"
+    return "operational" if status else "non_operational"
+
+
+def _snapshot(table: str, item):
+    if isinstance(item, dict):
+        return {field: item.get(field) for field in TRACKED_FIELDS[table]}
+    return {field: getattr(item, field) for field in TRACKED_FIELDS[table]}
+
+
+def tracked_columns(model):
+    return [getattr(model, field) for field in TRACKED_FIELDS[model.__tablename__]]
+
+
+def counter_snapshot(model, item):
+    """Copies the tracked fields of an ORM instance, to diff against after it changes."""
+    return _snapshot(model.__tablename__, item)
+
+
+def _buckets(table: str, values: dict):
+    buckets = [("total", table)]
+    if table == "vehicles":
+        buckets.append(("vehicles_by_type", values["type"] or "unknown"))
+        buckets.append(("vehicles_by_year", year_bucket(values["year"])))
+    elif table == "equipment_safety":
+        buckets.append(("equipment_safety_by_status", status_bucket(values["status"])))
+    return buckets
+
+
+def counter_deltas(table: str, before=None, after=None, deltas=None):
+    """Adds to ``deltas`` the counter changes of one row going from ``before`` to ``after``."""
+    deltas = Counter() if deltas is None else deltas
+    if before is not None:
+        for key in _buckets(table, _snapshot(table, before)):
+            deltas[key] -= 1
+    if after is not None:
+        for key in _buckets(table, _snapshot(table, after)):
+            deltas[key] += 1
+    return deltas
+
+
+async def apply_counter_deltas(session, deltas):
+    rows = [{"metric": metric, "bucket": bucket, "value": value} for (metric, bucket), value in deltas.items() if value]
+    if not rows:
+        return
+    statement = sqlite_insert(SummaryCounter.__table__)
+    statement = statement.on_conflict_do_update(
+        index_elements=["metric", "bucket"],
+        set_={"value": SummaryCounter.__table__.c.value + statement.excluded.value},
+    )
+    await session.execute(statement, rows)
+
+
+async def track_change(session, model, before=None, after=None):
+    """Updates the summary counters in the session's current transaction (call before commit)."""
+    await apply_counter_deltas(session, counter_deltas(model.__tablename__, before, after))
+
+
+async def read_summary(session):
+    summary = {"totals": {}, "vehicles_by_type": {}, "vehicles_by_year": {}, "equipment_safety_by_status": {}}
+    for counter in (await session.scalars(select(SummaryCounter))).all():
+        if counter.metric == "total":
+            summary["totals"][counter.bucket] = counter.value
+        elif counter.value:
+            summary[counter.metric][counter.bucket] = counter.value
+    return summary
+
+
+def rebuild_counters(session, chunk_size: int = 10000):
+    """Recomputes every counter from the base tables (sync session), in one transaction."""
+    deltas = Counter()
+    for model in (Vehicle, Equipment, EquipmentSafety):
+        table = model.__tablename__
+        deltas.update({("total", table): 0})
+        columns = tracked_columns(model) or [model.id]
+        result = session.execute(select(*columns).execution_options(yield_per=chunk_size))
+        for row in result.mappings():
+            counter_deltas(table, after=dict(row), deltas=deltas)
+    session.execute(delete(SummaryCounter))
+    rows = [{"metric": metric, "bucket": bucket, "value": value} for (metric, bucket), value in deltas.items()]
+    session.execute(insert(SummaryCounter), rows)
+    session.commit()
+    return deltas
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Manage the /summary counters table")
+    parser.add_argument("command", choices=["rebuild"])
+    parser.parse_args()
+
+    from wayne_api.database import SessionLocal
+
+    with SessionLocal() as session:
+        counters = rebuild_counters(session)
+    for (metric, bucket), value in sorted(counters.items()):
+        print(f"{metric:28} {bucket:20} {value}")
@@ -0,0 +1,53 @@
+import logging
+import os
+import time
+
+from jose import jwt
+from sqlalchemy import text
+
+from wayne_api.database import open_session
+from wayne_api.passwords import bcrypt_context, password_pool
+from wayne_api.settings import SECRET_KEY, ALGORITHM
+
+
+logger = logging.getLogger("uvicorn.error")
+
+# referência do cold start: import do app, ou o fork do worker (o launcher reinicia o valor)
+startup_timings = {"started": time.perf_counter()}
+# chamado com startup_timings quando o processo fica pronto (o launcher usa para medir o boot)
+on_ready = None
+
+
+def _load_bcrypt_backend():
+    # o passlib só escolhe e carrega o backend do bcrypt no primeiro uso
+    bcrypt_context.handler().get_backend()
+
+
+async def warm_up():
+    """Pays the one-off costs that would otherwise land on the first requests of a worker.
+
+    Opens a connection on the writer and reader engines (running the connect pragmas),
+    does a JWT encode/decode round trip and loads the bcrypt backend inside the password
+    pool (starting its executor). Returns the elapsed seconds.
+    """
+    started = time.perf_counter()
+    for read_only in (False, True):
+        session = open_session(read_only=read_only)
+        try:
+            await session.execute(text("SELECT 1"))
+        finally:
+            await session.close()
+    jwt.decode(jwt.encode({"sub": "0"}, SECRET_KEY, algorithm=ALGORITHM), SECRET_KEY, algorithms=[ALGORITHM])
+    await password_pool.run(_load_bcrypt_backend)
+    return time.perf_counter() - started
+
+
+def mark_ready(warmup_seconds: float = 0.0):
+    startup_timings["warmup_seconds"] = warmup_seconds
+    startup_timings["cold_start_seconds"] = time.perf_counter() - startup_timings["started"]
+    logger.info(
+        "Worker %d ready: cold start %.0f ms (warmup %.0f ms)",
+        os.getpid(), startup_timings["cold_start_seconds"] * 1000, warmup_seconds * 1000,
+    )
+    if on_ready is not None:
+        on_ready(startup_timings)
@@ -0,0 +1,254 @@
+import asyncio
+import logging
+import time
+from collections import Counter
+
+from fastapi import HTTPException, status
+from sqlalchemy import select
+
+from wayne_api.database import open_session
+from wayne_api.etag import collection_versions
+from wayne_api.events import change_hub
+from wayne_api.metrics import Histogram
+from wayne_api.models import EquipmentSafety
+from wayne_api.schemas import EquipmentSafetyPublic
+from wayne_api.summary import apply_counter_deltas, counter_deltas, counter_snapshot
+from wayne_api.settings import WRITE_BEHIND_FLUSH_MS, WRITE_BEHIND_MAX_BATCH, WRITE_BEHIND_MAX_PENDING, WRITE_BEHIND_MAX_ATTEMPTS
+
+
+logger = logging.getLogger("uvicorn.error")
+
+FLUSH_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+BATCH_BUCKETS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000)
+MAX_BACKOFF_SECONDS = 5.0
+
+
+class PendingWrite:
+    __slots__ = ("fields", "waiters", "queued_at", "attempts")
+
+    def __init__(self, fields: dict):
+        self.fields = fields
+        self.waiters = []
+        self.queued_at = time.perf_counter()
+        self.attempts = 0
+
+
+class WriteBehindQueue:
+    """Coalesces PATCHes of one model in memory and flushes them in a single transaction.
+
+    Only the last value of each field per id survives until the flush, which runs every
+    ``flush_ms`` or as soon as ``max_batch`` ids are waiting. ``submit`` can return a
+    future resolved with the public dict of the row once its flush commits (``None`` if
+    the row was deleted meanwhile). Past ``max_pending`` ids new writes get 503.
+
+    When a batch fails, each id is retried in a transaction of its own so one bad
+    write does not hold back the others. An id failing ``max_attempts`` flushes in a
+    row is dropped and its waiters get the error; failed flushes back off exponentially.
+    """
+
+    def __init__(self, model, schema, collection: str, flush_ms: float, max_batch: int, max_pending: int, max_attempts: int):
+        self.model = model
+        self.schema = schema
+        self.collection = collection
+        self.flush_interval = flush_ms / 1000
+        self.max_batch = max_batch
+        self.max_pending = max_pending
+        self.max_attempts = max_attempts
+        self._consecutive_failures = 0
+        self._pending: dict[int, PendingWrite] = {}
+        self._not_empty = asyncio.Event()
+        self._full = asyncio.Event()
+        self._stopping = False
+        self._task = None
+        self.submitted = 0
+        self.coalesced = 0
+        self.flushed = 0
+        self.failures = 0
+        self.rejected = 0
+        self.dropped = 0
+        self.flush_seconds = Histogram(FLUSH_BUCKETS)
+        self.queue_delay_seconds = Histogram(FLUSH_BUCKETS)
+        self.batch_sizes = Histogram(BATCH_BUCKETS)
+
+    @property
+    def pending(self):
+        return len(self._pending)
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self, timeout: float = 10):
+        """Flushes whatever is queued and stops the background task."""
+        if self._task is None:
+            return
+        self._stopping = True
+        self._not_empty.set()
+        self._full.set()
+        try:
+            await asyncio.wait_for(self._task, timeout)
+        except asyncio.TimeoutError:
+            logger.error(
+                "Write-behind flush of %s timed out, %d pending writes lost: %r",
+                self.collection, len(self._pending), {item_id: entry.fields for item_id, entry in self._pending.items()},
+            )
+        self._task = None
+
+    async def current(self, session, item_id: int):
+        """The row as clients should see it: database state plus the writes still queued."""
+        item = await session.get(self.model, item_id)
+        if item is None:
+            return None
+        data = self.schema.model_validate(item).model_dump()
+        entry = self._pending.get(item_id)
+        if entry is not None:
+            data.update(entry.fields)
+        return data
+
+    def submit(self, item_id: int, fields: dict, wait: bool = True):
+        entry = self._pending.get(item_id)
+        if entry is None:
+            if len(self._pending) >= self.max_pending:
+                self.rejected += 1
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Write queue full, try again later",
+                    headers={"Retry-After": "1"},
+                )
+            entry = self._pending[item_id] = PendingWrite(dict(fields))
+        else:
+            entry.fields.update(fields)
+            self.coalesced += 1
+        self.submitted += 1
+        waiter = None
+        if wait:
+            waiter = asyncio.get_running_loop().create_future()
+            entry.waiters.append(waiter)
+        self._not_empty.set()
+        if len(self._pending) >= self.max_batch:
+            self._full.set()
+        return waiter
+
+    async def _run(self):
+        while True:
+            await self._not_empty.wait()
+            if not self._stopping:
+                # janela de coalescência: espera o intervalo ou o lote encher
+                try:
+                    await asyncio.wait_for(self._full.wait(), self.flush_interval)
+                except asyncio.TimeoutError:
+                    pass
+            if not await self.flush():
+                # backoff exponencial enquanto os flushes falham (também no stop: as tentativas são limitadas)
+                await asyncio.sleep(min(self.flush_interval * 2 ** self._consecutive_failures, MAX_BACKOFF_SECONDS))
+            if self._stopping and not self._pending:
+                return
+
+    def _take_batch(self):
+        ids = list(self._pending)[: self.max_batch]
+        batch = {item_id: self._pending.pop(item_id) for item_id in ids}
+        if not self._pending:
+            self._not_empty.clear()
+        if len(self._pending) < self.max_batch:
+            self._full.clear()
+        return batch
+
+    def _requeue(self, batch):
+        for item_id, entry in batch.items():
+            newer = self._pending.get(item_id)
+            if newer is not None:
+                # o que chegou depois do lote vale por cima do que falhou
+                entry.fields.update(newer.fields)
+                entry.waiters += newer.waiters
+            self._pending[item_id] = entry
+        if self._pending:
+            self._not_empty.set()
+
+    async def _write(self, batch) -> dict:
+        """Applies ``batch`` in one transaction; returns the public dict of each row still there."""
+        results = {}
+        session = open_session()
+        try:
+            rows = (await session.scalars(select(self.model).where(self.model.id.in_(list(batch))))).all()
+            deltas = Counter()
+            for item in rows:
+                before = counter_snapshot(self.model, item)
+                for key, value in batch[item.id].fields.items():
+                    setattr(item, key, value)
+                counter_deltas(self.collection, before, item, deltas)
+                results[item.id] = self.schema.model_validate(item).model_dump()
+            await apply_counter_deltas(session, deltas)
+            await session.commit()
+        except BaseException:
+            await session.rollback()
+            raise
+        finally:
+            await session.close()
+        return results
+
+    def _fail(self, failed: dict):
+        """Requeues the ids whose write failed, or drops them after ``max_attempts``."""
+        retry = {}
+        for item_id, (entry, exc) in failed.items():
+            entry.attempts += 1
+            if entry.attempts < self.max_attempts:
+                retry[item_id] = entry
+                continue
+            self.dropped += 1
+            # os campos vão no log: é o único registro do que foi perdido
+            logger.error(
+                "Dropping write-behind update of %s %d after %d attempts, fields=%r: %r",
+                self.collection, item_id, entry.attempts, entry.fields, exc,
+            )
+            for waiter in entry.waiters:
+                if not waiter.done():
+                    waiter.set_exception(HTTPException(
+                        status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                        detail="Write failed and was discarded",
+                    ))
+        self._requeue(retry)
+
+    async def flush(self) -> bool:
+        """Writes one batch. Returns False when some write failed (the caller backs off)."""
+        batch = self._take_batch()
+        if not batch:
+            return True
+        started = time.perf_counter()
+        failed = {}
+        try:
+            results = await self._write(batch)
+        except Exception:
+            self.failures += 1
+            logger.exception("Write-behind flush of %d %s rows failed, retrying them one by one", len(batch), self.collection)
+            results = {}
+            for item_id, entry in batch.items():
+                try:
+                    results.update(await self._write({item_id: entry}))
+                except Exception as exc:
+                    failed[item_id] = (entry, exc)
+
+        finished = time.perf_counter()
+        written = {item_id: entry for item_id, entry in batch.items() if item_id not in failed}
+        self.flushed += len(written)
+        self.flush_seconds.observe(finished - started)
+        self.batch_sizes.observe(len(batch))
+        if written:
+            self.queue_delay_seconds.observe(finished - min(entry.queued_at for entry in written.values()))
+        if results:
+            collection_versions.bump(self.collection)
+            change_hub.publish(self.collection, "batch", data={"created": [], "updated": list(results), "deleted": []})
+        for item_id, entry in written.items():
+            for waiter in entry.waiters:
+                if not waiter.done():
+                    waiter.set_result(results.get(item_id))
+        if failed:
+            self._fail(failed)
+            self._consecutive_failures += 1
+            return False
+        self._consecutive_failures = 0
+        return True
+
+
+equipment_safety_writes = WriteBehindQueue(
+    EquipmentSafety, EquipmentSafetyPublic, "equipment_safety",
+    WRITE_BEHIND_FLUSH_MS, WRITE_BEHIND_MAX_BATCH, WRITE_BEHIND_MAX_PENDING, WRITE_BEHIND_MAX_ATTEMPTS,
+)
@@ -445,6 +445,36 @@ if (document.getElementById("btn-logout")) {
         loadVehicles();
     })();
     document.querySelectorAll('.panel').forEach(p => p.classList.remove('hidden'));
+
+    // ---------- atualizações em tempo real (SSE em /events/stream) ----------
+    (function subscribeChanges() {
+        if (!window.EventSource) return;
+        const loaders = {
+            equipment: loadEquipments,
+            equipment_safety: loadEquipmentSafety,
+            vehicles: loadVehicles,
+        };
+        const pending = {};
+        // agrupa rajadas de eventos (ex.: /batch) em um único recarregamento por lista
+        function scheduleReload(collection) {
+            if (!loaders[collection] || pending[collection]) return;
+            pending[collection] = setTimeout(() => {
+                delete pending[collection];
+                loaders[collection]();
+            }, 200);
+        }
+        let connectedBefore = false;
+        const source = new EventSource(`${API_BASE_URL}/events/stream?token=${encodeURIComponent(token)}`);
+        source.onopen = () => {
+            // após reconectar, eventos podem ter sido perdidos: recarrega tudo
+            if (connectedBefore) Object.keys(loaders).forEach(scheduleReload);
+            connectedBefore = true;
+        };
+        source.onmessage = (ev) => {
+            const change = JSON.parse(ev.data);
+            scheduleReload(change.collection);
+        };
+    })();
 }
 
 